@@ -233,7 +233,7 @@ function sortNodes(orderKey, nodes, edges, data) {
             sortByNeighborhood(nodes, edges);
             break;
         case "cluster":
-            // TODO
+            sortByCluster(nodes);
             break;
         case "gansner":
             sortByGansner(nodes);
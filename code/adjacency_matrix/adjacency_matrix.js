@@ -128,7 +128,7 @@ function adjacency_matrix(view, data) {
                 otherNodes = sortByAdjacency(nodes, edges, orderingNode);
                 break;
             case "cluster":
-                // TODO
+                sortByCluster(nodes);
                 break;
             case "gansner":
                 sortByGansner(nodes);
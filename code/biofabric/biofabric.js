@@ -124,7 +124,7 @@ function biofabric(view, data) {
                 sortByNeighborhood(nodes, edges, bfOrderingNode);
                 break;
             case "cluster":
-                // TODO
+                sortByCluster(nodes);
                 break;
             case "gansner":
                 sortByGansner(nodes);
@@ -0,0 +1,151 @@
+# This file packs the datasets of the task files into one compressed bundle with a byte-offset index, so that the study
+# page can fetch single datasets with range requests. It also provides a static file server which answers them.
+# usage: python bundle.py          (writes bundle/datasets.bin and bundle/index.json, rerun after generate_tasks.py)
+#        python bundle.py check    (fails if the bundle differs from the datasets, also run by verify_tasks.py --bundle)
+#        python bundle.py serve [port]
+
+import glob
+import gzip
+import hashlib
+import io
+import json
+import os
+import re
+import sys
+from functools import partial
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+
+from loader import load, root
+
+bundle_dir = os.path.join(root, 'bundle')
+
+
+def referenced_datasets(task_files):
+    """
+    This function collects the datasets referenced by the 'data' entries of the given task files.
+    :param task_files: task files
+    :return: sorted list of dataset paths relative to the data root
+    """
+    paths = set()
+    for filename in task_files:
+        for phases in load(filename).values():
+            for trials in phases.values():
+                paths.update(task['data'] for task in trials)
+    return sorted(paths)
+
+
+def dataset_hash(path):
+    """
+    This function computes the hash of the compact JSON form of a dataset, which is the form stored in the bundle.
+    :param path: dataset path relative to the data root
+    :return: compact JSON, hex digest
+    """
+    content = json.dumps(load(path), separators=(',', ':')).encode()
+    return content, hashlib.sha1(content).hexdigest()
+
+
+def write_bundle(paths, directory=bundle_dir):
+    """
+    This function writes the given datasets into one file. Every dataset is stored as compact JSON in its own gzip
+    member, so that it can be decompressed on its own; datasets with the same content are stored once. The index maps
+    each path to the offset and length of its member.
+    :param paths: dataset paths relative to the data root
+    :param directory: directory of the bundle
+    :return: index
+    """
+    os.makedirs(directory, exist_ok=True)
+    index = {'file': 'datasets.bin', 'compression': 'gzip', 'datasets': {}}
+    stored = {}
+    offset = 0
+    with open(os.path.join(directory, index['file']), 'wb') as outfile:
+        for path in paths:
+            content, digest = dataset_hash(path)
+            if digest not in stored:
+                member = gzip.compress(content, mtime=0)
+                outfile.write(member)
+                stored[digest] = {'offset': offset, 'length': len(member), 'hash': digest}
+                offset += len(member)
+            index['datasets'][path] = stored[digest]
+
+    with open(os.path.join(directory, 'index.json'), 'w') as outfile:
+        json.dump(index, outfile, separators=(',', ':'))
+
+    return index
+
+
+def stale_datasets(task_files, directory=bundle_dir):
+    """
+    This function lists the datasets of the given task files whose content differs from the bundled one, e.g. after
+    generating the tasks again or adding orderings, layouts or communities to them. Datasets which are not in the
+    bundle are not stale, as the study page loads them from their own file.
+    :param task_files: task files
+    :param directory: directory of the bundle
+    :return: list of dataset paths relative to the data root
+    """
+    index_file = os.path.join(directory, 'index.json')
+    if not os.path.isfile(index_file):
+        return []
+    with open(index_file) as file:
+        bundled = json.load(file)['datasets']
+    return [path for path in referenced_datasets(task_files)
+            if path in bundled and bundled[path]['hash'] != dataset_hash(path)[1]]
+
+
+class RangeRequestHandler(SimpleHTTPRequestHandler):
+    """
+    This class extends the static file server of the standard library, which ignores the Range header, with single
+    byte ranges.
+    """
+
+    def send_head(self):
+        match = re.fullmatch(r'bytes=(\d+)-(\d*)', self.headers.get('Range', ''))
+        path = self.translate_path(self.path)
+        if match is None or not os.path.isfile(path):
+            return super().send_head()
+
+        size = os.path.getsize(path)
+        start = int(match.group(1))
+        end = min(int(match.group(2)) if match.group(2) else size - 1, size - 1)
+        if start > end:
+            self.send_error(416, 'Requested Range Not Satisfiable')
+            return None
+
+        with open(path, 'rb') as file:
+            file.seek(start)
+            content = file.read(end - start + 1)
+        self.send_response(206)
+        self.send_header('Content-Type', self.guess_type(path))
+        self.send_header('Content-Range', 'bytes {}-{}/{}'.format(start, end, size))
+        self.send_header('Content-Length', str(len(content)))
+        self.send_header('Accept-Ranges', 'bytes')
+        self.end_headers()
+        return io.BytesIO(content)
+
+
+def serve(port=8000):
+    """
+    This function serves the code directory (the parent of the data root) with range request support.
+    :param port: port
+    """
+    handler = partial(RangeRequestHandler, directory=os.path.dirname(root))
+    with ThreadingHTTPServer(('', port), handler) as server:
+        print('serving on http://localhost:{}/study_framework.html'.format(port))
+        server.serve_forever()
+
+
+if __name__ == '__main__':
+    task_files = sorted(glob.glob(os.path.join(root, 'tasks', '*.json')))
+    if sys.argv[1:2] == ['serve']:
+        for dataset in stale_datasets(task_files):
+            print('warning: {} changed since the bundle was written, run python bundle.py'.format(dataset))
+        serve(int(sys.argv[2]) if len(sys.argv) > 2 else 8000)
+    elif sys.argv[1:2] == ['check']:
+        stale = stale_datasets(task_files)
+        for dataset in stale:
+            print('{} changed since the bundle was written'.format(dataset))
+        sys.exit(1 if stale else 0)
+    else:
+        datasets = referenced_datasets(task_files)
+        index = write_bundle(datasets)
+        print('bundled {} datasets as {} entries'.format(len(datasets), len(set(e['offset'] for e in
+                                                                                   index['datasets'].values()))))
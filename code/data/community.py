@@ -0,0 +1,163 @@
+# This file detects communities with the Louvain method and stores them as 'community' and 'cluster' on each node.
+# usage: python community.py <dataset or directory> [...]
+
+import sys
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+from scipy.sparse import csr_matrix
+
+from loader import datasets, update_nodes
+
+
+def weighted_adjacency(g):
+    """
+    This function builds the symmetric adjacency matrix of a graph in which parallel edges add up. A self-loop is
+    stored twice on the diagonal, so that the row sums are the weighted degrees.
+    :param g: array-backed graph
+    :return: sparse matrix
+    """
+    rows = np.concatenate([g.source, g.target])
+    cols = np.concatenate([g.target, g.source])
+    return csr_matrix((np.ones(len(rows)), (rows, cols)), shape=(g.num_nodes, g.num_nodes))
+
+
+def modularity(a, labels, resolution=1.0):
+    """
+    This function computes the modularity of a partition.
+    :param a: symmetric adjacency matrix
+    :param labels: array of the community of each node
+    :param resolution: resolution parameter
+    :return: modularity
+    """
+    total = a.sum()
+    if total == 0:
+        return 0.0
+    coo = a.tocoo()
+    inside = np.bincount(labels[coo.row], weights=coo.data * (labels[coo.row] == labels[coo.col]),
+                         minlength=labels.max() + 1)
+    degree = np.bincount(labels, weights=np.asarray(a.sum(axis=1)).ravel(), minlength=labels.max() + 1)
+    return float((inside / total - resolution * (degree / total) ** 2).sum())
+
+
+def local_moving(a, resolution, rng):
+    """
+    This function moves single nodes to the neighboring community with the largest modularity gain until no move
+    improves the modularity any more. The adjacency is read from the arrays of the sparse matrix; the loop runs over
+    python lists, which is faster than numpy calls for the few neighbors of a node.
+    :param a: symmetric adjacency matrix
+    :param resolution: resolution parameter
+    :param rng: numpy random generator
+    :return: array of the community of each node
+    """
+    n = a.shape[0]
+    indptr = a.indptr.tolist()
+    indices = a.indices.tolist()
+    weights = a.data.tolist()
+    degree = np.asarray(a.sum(axis=1)).ravel().tolist()
+    scale = resolution / a.sum()
+
+    labels = list(range(n))
+    totals = list(degree)
+    # only nodes whose neighborhood changed are visited again, as in the fast local moving of Leiden
+    queue = deque(rng.permutation(n).tolist())
+    queued = [True] * n
+    while queue:
+        i = queue.popleft()
+        queued[i] = False
+        own = labels[i]
+        links = {}
+        for p in range(indptr[i], indptr[i + 1]):
+            j = indices[p]
+            if j != i:
+                links[labels[j]] = links.get(labels[j], 0.0) + weights[p]
+
+        totals[own] -= degree[i]
+        best, best_gain = own, links.get(own, 0.0) - totals[own] * degree[i] * scale
+        for community, weight in links.items():
+            gain = weight - totals[community] * degree[i] * scale
+            if gain > best_gain + 1e-12:
+                best, best_gain = community, gain
+        totals[best] += degree[i]
+
+        if best != own:
+            labels[i] = best
+            for p in range(indptr[i], indptr[i + 1]):
+                j = indices[p]
+                if not queued[j] and labels[j] != best:
+                    queued[j] = True
+                    queue.append(j)
+
+    return np.unique(np.asarray(labels), return_inverse=True)[1]
+
+
+def louvain(g, resolution=1.0, seed=0):
+    """
+    This function partitions a graph into communities with the Louvain method: local moving alternates with merging
+    every community into a single node until the partition does not change any more.
+    :param g: array-backed graph
+    :param resolution: resolution parameter (larger values give smaller communities)
+    :param seed: seed of the random node order
+    :return: array of the community of each node, numbered by decreasing size
+    """
+    rng = np.random.default_rng(seed)
+    a = weighted_adjacency(g)
+    labels = np.arange(g.num_nodes)
+    if a.sum() == 0:
+        return labels
+
+    while True:
+        level = local_moving(a, resolution, rng)
+        count = level.max() + 1
+        labels = level[labels]
+        if count == a.shape[0]:
+            break
+        # merge the communities: the aggregated matrix is P^T A P
+        p = csr_matrix((np.ones(len(level)), (np.arange(len(level)), level)), shape=(len(level), count))
+        a = (p.T @ a @ p).tocsr()
+
+    sizes = np.bincount(labels)
+    order = np.lexsort((np.arange(len(sizes)), -sizes))
+    rename = np.empty(len(sizes), dtype=np.int64)
+    rename[order] = np.arange(len(sizes))
+    return rename[labels]
+
+
+def community_ordering(g, labels):
+    """
+    This function orders the nodes by community, the largest community first, and within a community by decreasing
+    degree.
+    :param g: array-backed graph
+    :param labels: array of the community of each node, numbered by decreasing size
+    :return: array of node positions in order
+    """
+    return np.lexsort((np.arange(g.num_nodes), -g.degree(), labels))
+
+
+def add_communities(name, resolution=1.0):
+    """
+    This function detects the communities of a dataset and writes the community of each node to 'community' and its
+    rank in the community-grouped ordering to 'cluster'.
+    :param name: dataset name
+    :param resolution: resolution parameter
+    :return: dataset name, number of communities, modularity or None if the dataset was skipped
+    """
+    def update(g):
+        labels = louvain(g, resolution)
+        rank = np.empty(g.num_nodes, dtype=np.int64)
+        rank[community_ordering(g, labels)] = np.arange(g.num_nodes)
+        count = int(labels.max()) + 1 if len(labels) else 0
+        values = {'community': labels.tolist(), 'cluster': rank.tolist()}
+        return values, (name, count, modularity(weighted_adjacency(g), labels, resolution))
+
+    return update_nodes(name, update)
+
+
+if __name__ == '__main__':
+    if len(sys.argv) < 2:
+        sys.exit('usage: python community.py <dataset or directory> [...]')
+    with ProcessPoolExecutor() as executor:
+        for result in executor.map(add_communities, datasets(*sys.argv[1:])):
+            if result is not None:
+                print('{}: {} communities, modularity {:.3f}'.format(*result))
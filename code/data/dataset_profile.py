@@ -0,0 +1,111 @@
+# This file profiles the node-link datasets and writes the statistics to profile.csv and profile_attributes.csv.
+# usage: python dataset_profile.py [<dataset or directory> ...]
+
+import csv
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+from scipy.sparse import csr_matrix
+from scipy.sparse.csgraph import connected_components
+
+from loader import datasets, load_graph, root
+
+columns = ['dataset', 'nodes', 'edges', 'density', 'self_loops', 'parallel_edges', 'min_degree', 'median_degree',
+           'mean_degree', 'max_degree', 'degree_distribution', 'components', 'largest_component', 'isolated_nodes',
+           'node_attributes', 'edge_attributes']
+attribute_columns = ['dataset', 'scope', 'attribute', 'kind', 'min', 'max', 'distinct', 'missing_rate']
+
+
+def profile_attributes(name, scope, attributes, count):
+    """
+    This function describes the attribute columns of the nodes or edges of a dataset.
+    :param name: dataset name
+    :param scope: 'node' or 'edge'
+    :param attributes: dict of columns
+    :param count: number of nodes or edges
+    :return: list of rows
+    """
+    rows = []
+    for attribute, column in attributes.items():
+        values = column.values[column.present]
+        numeric = column.kind in ('int', 'float', 'bool') and len(values)
+        rows.append({'dataset': name, 'scope': scope, 'attribute': attribute, 'kind': column.kind,
+                     'min': values.min().item() if numeric else '', 'max': values.max().item() if numeric else '',
+                     'distinct': len(set(values.tolist())) if column.kind != 'object' else '',
+                     'missing_rate': round(1 - len(values) / count, 4) if count else 0})
+    return rows
+
+
+def profile(name):
+    """
+    This function computes the statistics of a dataset in one pass over its arrays. The density is the number of
+    edges divided by n * (n - 1), as in the generators and the size/density grid of generate_tasks.py.
+    :param name: dataset name
+    :return: row of the summary table, rows of the attribute table
+    """
+    g = load_graph(name)
+    n, m = g.num_nodes, g.num_edges
+    name = os.path.relpath(name, root)
+
+    loops = g.source == g.target
+    u = np.minimum(g.source, g.target).astype(np.int64)
+    v = np.maximum(g.source, g.target).astype(np.int64)
+    parallel = m - len(np.unique(u * max(n, 1) + v))
+
+    degree = g.degree()
+    histogram = np.bincount(degree) if n else np.zeros(0, dtype=np.int64)
+    adjacency = csr_matrix((np.ones(m), (g.source, g.target)), shape=(n, n))
+    count, labels = connected_components(adjacency, directed=False) if n else (0, np.zeros(0, dtype=np.int64))
+
+    summary = {'dataset': name, 'nodes': n, 'edges': m, 'density': round(m / (n * (n - 1)), 4) if n > 1 else 0,
+               'self_loops': int(loops.sum()), 'parallel_edges': int(parallel),
+               'min_degree': int(degree.min()) if n else 0, 'median_degree': float(np.median(degree)) if n else 0,
+               'mean_degree': round(float(degree.mean()), 3) if n else 0, 'max_degree': int(degree.max()) if n else 0,
+               'degree_distribution': ' '.join('{}:{}'.format(d, c) for d, c in enumerate(histogram.tolist()) if c),
+               'components': int(count), 'largest_component': int(np.bincount(labels).max()) if n else 0,
+               'isolated_nodes': int(histogram[0]) if len(histogram) else 0,
+               'node_attributes': len(g.node_attributes), 'edge_attributes': len(g.edge_attributes)}
+    attributes = profile_attributes(name, 'node', g.node_attributes, n) + \
+        profile_attributes(name, 'edge', g.edge_attributes, m)
+
+    return summary, attributes
+
+
+def _profile(name):
+    # only datasets which cannot be loaded are skipped, errors in the statistics are not caught
+    try:
+        load_graph(name)
+    except (ValueError, KeyError, TypeError) as error:
+        print('skipping {}: {}'.format(name, error), file=sys.stderr)
+        return None
+    return profile(name)
+
+
+def write_profile(names, path=root, workers=None):
+    """
+    This function profiles the given datasets in parallel and writes the summary and the attribute table.
+    :param names: dataset names or directories
+    :param path: directory of the tables
+    :param workers: number of processes
+    :return: rows of the summary table
+    """
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        results = [result for result in executor.map(_profile, datasets(*names)) if result is not None]
+
+    with open(os.path.join(path, 'profile.csv'), 'w', newline='') as outfile:
+        writer = csv.DictWriter(outfile, fieldnames=columns)
+        writer.writeheader()
+        writer.writerows(summary for summary, _ in results)
+    with open(os.path.join(path, 'profile_attributes.csv'), 'w', newline='') as outfile:
+        writer = csv.DictWriter(outfile, fieldnames=attribute_columns)
+        writer.writeheader()
+        writer.writerows(row for _, attributes in results for row in attributes)
+
+    return [summary for summary, _ in results]
+
+
+if __name__ == '__main__':
+    rows = write_profile(sys.argv[1:])
+    print('profiled {} datasets'.format(len(rows)))
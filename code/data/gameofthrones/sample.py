@@ -1,23 +1,51 @@
 # This file samples the network data of game of thrones.
 
 import json
+import os
 import random
+import sys
 
+import numpy as np
 
-def get_attribute_values(data, node, attributes):
-    values = [e['attributes'] for e in data['links'] if e['source'] == node['id'] or e['target'] == node['id']]
-    return [v['Season ' + str(i + 1)] for v in values for i in range(attributes) if ('Season ' + str(i + 1)) in v]
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from loader import load, load_graph
+
+
+def season_weights(g, attributes):
+    """
+    This function sums the weights of each edge over the first seasons.
+    :param g: array-backed graph
+    :param attributes: number of seasons
+    :return: array of weights per edge
+    """
+    weights = np.zeros(g.num_edges)
+    for i in range(attributes):
+        column = g.edge_attributes.get('Season ' + str(i + 1))
+        if column is not None:
+            weights += np.where(column.present, column.values, 0)
+    return weights
 
 
 def sample(filename, size, density, attributes):
-    with open('/Users/mariaheinle/Documents/Studium/Bachelor Arbeit/biofabricevaluation/code/data/gameofthrones/got.json', 'r') as file:
-        data = json.loads(file.read())
+    data = load('gameofthrones/got.json', copy=True)
+    g = load_graph('gameofthrones/got.json')
+
+    # the weight of a node is the sum over its edges, a self-loop counts once
+    weights = season_weights(g, attributes)
+    loops = g.source == g.target
+    totals = np.bincount(g.source, weights=weights, minlength=g.num_nodes) + \
+        np.bincount(g.target[~loops], weights=weights[~loops], minlength=g.num_nodes)
+    ordered = np.argsort(-totals, kind='stable')[0:size]
+    nodes = [data['nodes'][i] for i in ordered.tolist()]
 
-    ordered = sorted(data['nodes'], key=lambda x: sum(get_attribute_values(data, x, attributes)), reverse=True)
-    nodes = ordered[0:size]
-    ids = [n['id'] for n in nodes]
     attr = ['Season ' + str(i + 1) for i in range(attributes)]
-    edges = [e for e in data['links'] if e['source'] in ids and e['target'] in ids and (set(e['attributes'].keys()) & set(attr))]
+    selected = np.zeros(g.num_nodes, dtype=bool)
+    selected[ordered] = True
+    active = np.zeros(g.num_edges, dtype=bool)
+    for a in attr:
+        if a in g.edge_attributes:
+            active |= g.edge_attributes[a].present
+    edges = [data['links'][j] for j in np.flatnonzero(selected[g.source] & selected[g.target] & active).tolist()]
     for e in edges:
         e['attributes'] = {k: e['attributes'][k] for k in attr if k in e['attributes']}
 
@@ -30,4 +58,5 @@ def sample(filename, size, density, attributes):
     return {'nodes': nodes, 'links': edges}
 
 
-sample('got_sample_large.json', 50, 0.2, 8)
\ No newline at end of file
+if __name__ == '__main__':
+    sample('got_sample_large.json', 50, 0.2, 8)
@@ -3,8 +3,12 @@
 import itertools
 from random import randint, choice, sample
 import networkx as nx
+import numpy as np
 import json
 import string
+from scipy.sparse import csr_matrix
+from scipy.sparse.csgraph import reverse_cuthill_mckee
+from graph import Column, Graph
 
 node_names = list(string.ascii_uppercase) + [s + "'" for s in string.ascii_uppercase] \
             + [s + "''" for s in string.ascii_uppercase] + [s + "'''" for s in string.ascii_uppercase] \
@@ -163,5 +167,244 @@ def generate_subnetworks_data(filename, num_nodes, num_node_attr, all_node_attr,
     return {'nodes': data["nodes"], 'edges': data["links"]}
 
 
-# generate network file :
-generate_data('248nodes.json', 248, 4, True, 0.025, 4, True)
+def random_attribute_columns(rng, count, num_attr, all_attr, values, label='Attribute {}'):
+    """
+    This function draws random attribute values for a number of nodes or edges directly into typed columns.
+    :param rng: numpy random generator
+    :param count: number of nodes or edges
+    :param num_attr: number of overall attributes
+    :param all_attr: boolean value whether each node or edge contains all attributes
+    :param values: possible attribute values
+    :param label: format of the attribute names
+    :return: dict of columns
+    """
+    kind = 'int' if all(isinstance(v, int) for v in values) else 'float'
+    columns = {}
+    for j in range(1, num_attr + 1):
+        present = np.ones(count, dtype=bool) if all_attr else rng.random(count) < 0.5
+        columns[label.format(j)] = Column(kind, rng.choice(np.asarray(values), count), present)
+    return columns
+
+
+def unique_edges(num_nodes, source, target):
+    """
+    This function removes self-loops and duplicates from the given undirected edges.
+    :param num_nodes: number of nodes
+    :param source: array of source nodes
+    :param target: array of target nodes
+    :return: arrays of source and target nodes with source < target
+    """
+    u = np.minimum(source, target).astype(np.int64)
+    v = np.maximum(source, target).astype(np.int64)
+    keys = np.unique((u * num_nodes + v)[u != v])
+    return keys // num_nodes, keys % num_nodes
+
+
+def write_array_data(filename, g, num_node_attr, all_node_attr, num_edge_attr, all_edge_attr, rng):
+    """
+    This function adds random attributes and an rcm ordering to the given graph and writes it to the given file.
+    :param filename: file to write
+    :param g: array-backed graph
+    :param num_node_attr: number of overall node attributes
+    :param all_node_attr: boolean value whether each node contains all attributes
+    :param num_edge_attr: number of overall edge attributes
+    :param all_edge_attr:boolean value whether each edge contains all attributes
+    :param rng: numpy random generator
+    :return: network data
+    """
+    weights = [round(i * 0.2, 1) for i in range(6)]
+    g.node_attributes.update(random_attribute_columns(rng, g.num_nodes, num_node_attr, all_node_attr, weights))
+    g.edge_attributes.update(random_attribute_columns(rng, g.num_edges, num_edge_attr, all_edge_attr, weights))
+
+    adjacency = csr_matrix((np.ones(g.num_edges, dtype=np.int8), (g.source, g.target)),
+                           shape=(g.num_nodes, g.num_nodes))
+    g.meta['rcm'] = g.ids[reverse_cuthill_mckee(adjacency, symmetric_mode=False)].tolist()
+
+    # write json formatted data, without indentation as these files get large
+    data = g.to_node_link()
+    json.dump(data, open(filename, "w"))
+
+    return {'nodes': data["nodes"], 'links': data["links"]}
+
+
+def generate_block_data(filename, block_sizes, p_in, p_out, num_node_attr, all_node_attr, num_edge_attr,
+                        all_edge_attr, seed=None):
+    """
+    This function generates a stochastic block model, i.e. communities which are dense inside and connected by
+    inter-community edges, and writes it to the given file. The edges are drawn directly into arrays, so networks with
+    millions of edges can be generated. Each node stores its community in 'block'.
+    The network data is returned.
+    :param filename: file to write
+    :param block_sizes: array of numbers of nodes per community
+    :param p_in: edge probability inside a community
+    :param p_out: edge probability between two communities
+    :param num_node_attr: number of overall node attributes
+    :param all_node_attr: boolean value whether each node contains all attributes
+    :param num_edge_attr: number of overall edge attributes
+    :param all_edge_attr:boolean value whether each edge contains all attributes
+    :param seed: seed of the random generator
+    :return: network data
+    """
+    rng = np.random.default_rng(seed)
+    sizes = np.asarray(block_sizes, dtype=np.int64)
+    starts = np.concatenate([[0], np.cumsum(sizes)])
+    num_nodes = int(starts[-1])
+
+    sources = []
+    targets = []
+    for a, b in itertools.combinations_with_replacement(range(len(sizes)), 2):
+        pairs = int(sizes[a] * (sizes[a] - 1) // 2 if a == b else sizes[a] * sizes[b])
+        # the number of edges of a block pair is binomial, the edges are distinct pairs drawn uniformly
+        m = rng.binomial(pairs, p_in if a == b else p_out)
+        keys = rng.choice(pairs, m, replace=False, shuffle=False)
+        u, v = triangle_pairs(keys) if a == b else (keys // sizes[b], keys % sizes[b])
+        sources.append(starts[a] + u)
+        targets.append(starts[b] + v)
+    source, target = unique_edges(num_nodes, np.concatenate(sources), np.concatenate(targets))
+
+    names = node_names if num_nodes <= len(node_names) else None
+    g = Graph.from_edges(num_nodes, source, target, names)
+    g.node_fields['block'] = Column('int', np.repeat(np.arange(len(sizes)), sizes), np.ones(num_nodes, dtype=bool))
+
+    return write_array_data(filename, g, num_node_attr, all_node_attr, num_edge_attr, all_edge_attr, rng)
+
+
+def triangle_pairs(keys):
+    """
+    This function maps indices of node pairs inside a block to the pairs. The indices enumerate the pairs u > v of the
+    lower triangle row by row, i.e. k = u * (u - 1) / 2 + v.
+    :param keys: array of pair indices
+    :return: arrays of u and v
+    """
+    keys = np.asarray(keys, dtype=np.int64)
+    u = np.floor((1 + np.sqrt(1 + 8 * keys.astype(np.float64))) / 2).astype(np.int64)
+    # the square root is rounded for large indices, so u is corrected by one step in either direction
+    u -= u * (u - 1) // 2 > keys
+    u += (u + 1) * u // 2 <= keys
+    return u, keys - u * (u - 1) // 2
+
+
+def generate_power_law_data(filename, num_nodes, num_edges, exponent, num_node_attr, all_node_attr, num_edge_attr,
+                            all_edge_attr, seed=None):
+    """
+    This function generates a Chung-Lu network whose expected degrees follow a power law with the given exponent and
+    writes it to the given file. The edges are drawn directly into arrays, so networks with millions of edges can be
+    generated. The network data is returned.
+    :param filename: file to write
+    :param num_nodes: number of nodes
+    :param num_edges: number of edges
+    :param exponent: exponent of the degree distribution (> 2)
+    :param num_node_attr: number of overall node attributes
+    :param all_node_attr: boolean value whether each node contains all attributes
+    :param num_edge_attr: number of overall edge attributes
+    :param all_edge_attr:boolean value whether each edge contains all attributes
+    :param seed: seed of the random generator
+    :return: network data
+    """
+    rng = np.random.default_rng(seed)
+    source, target = power_law_edges(rng, num_nodes, num_edges, exponent)
+
+    names = node_names if num_nodes <= len(node_names) else None
+    g = Graph.from_edges(num_nodes, source, target, names)
+
+    return write_array_data(filename, g, num_node_attr, all_node_attr, num_edge_attr, all_edge_attr, rng)
+
+
+def power_law_edges(rng, num_nodes, num_edges, exponent):
+    """
+    This function draws the edges of a Chung-Lu network: both endpoints of an edge are chosen with a probability
+    proportional to the expected degree of the node. Self-loops and duplicates are removed and new edges are drawn
+    until the requested number is reached or the network cannot get any denser.
+    :param rng: numpy random generator
+    :param num_nodes: number of nodes
+    :param num_edges: number of edges
+    :param exponent: exponent of the degree distribution (> 2)
+    :return: arrays of source and target nodes
+    """
+    weights = np.arange(1, num_nodes + 1, dtype=np.float64) ** (-1 / (exponent - 1))
+    cumulative = np.cumsum(weights / weights.sum())
+    num_edges = min(num_edges, num_nodes * (num_nodes - 1) // 2)
+
+    keys = np.empty(0, dtype=np.int64)
+    for _ in range(10):
+        missing = num_edges - len(keys)
+        if missing <= 0:
+            break
+        draw = int(missing * 1.2) + 16
+        u = np.minimum(np.searchsorted(cumulative, rng.random(draw)), num_nodes - 1)
+        v = np.minimum(np.searchsorted(cumulative, rng.random(draw)), num_nodes - 1)
+        source, target = unique_edges(num_nodes, u, v)
+        keys = np.union1d(keys, source * num_nodes + target)
+
+    # keep a random subset, so that the hubs are not favoured by the order of the keys
+    keys = rng.permutation(keys)[:num_edges]
+    return keys // num_nodes, keys % num_nodes
+
+
+def activity_chains(rng, num_edges, num_snapshots, activity, persistence):
+    """
+    This function switches edges on and off over the snapshots with a two-state markov chain per edge. The activation
+    probability is chosen such that the fraction of active edges stays at 'activity'.
+    :param rng: numpy random generator
+    :param num_edges: number of edges
+    :param num_snapshots: number of snapshots
+    :param activity: fraction of edges which are active in a snapshot
+    :param persistence: probability that an active edge stays active in the next snapshot
+    :return: boolean array of shape (snapshots, edges)
+    """
+    activation = min(1.0, activity * (1 - persistence) / max(1 - activity, 1e-9))
+    active = np.empty((num_snapshots, num_edges), dtype=bool)
+    active[0] = rng.random(num_edges) < activity
+    for t in range(1, num_snapshots):
+        draw = rng.random(num_edges)
+        active[t] = np.where(active[t - 1], draw < persistence, draw < activation)
+    return active
+
+
+def generate_temporal_data(filename, num_nodes, num_edges, num_snapshots, activity, persistence, exponent=2.5,
+                           max_weight=20, seed=None):
+    """
+    This function generates a temporal network shaped like the game of thrones seasons and writes it to the given file.
+    The edges are drawn once from a power law network; every edge is then switched on and off over the snapshots by a
+    two-state markov chain and stores its weight for each snapshot it is active in as 'Season i'. An edge which is
+    never active gets a new chain, so that all edges appear in at least one snapshot; this raises the fraction of
+    active edges a little above 'activity' (e.g. 0.41 for 8 snapshots, activity 0.3 and persistence 0.7). The network
+    data is returned.
+    :param filename: file to write
+    :param num_nodes: number of nodes
+    :param num_edges: number of edges over all snapshots
+    :param num_snapshots: number of snapshots
+    :param activity: fraction of edges which are active in a snapshot, before inactive edges get a new chain
+    :param persistence: probability that an active edge stays active in the next snapshot
+    :param exponent: exponent of the degree distribution (> 2)
+    :param max_weight: maximum weight of an edge in a snapshot
+    :param seed: seed of the random generator
+    :return: network data
+    """
+    rng = np.random.default_rng(seed)
+    source, target = power_law_edges(rng, num_nodes, num_edges, exponent)
+
+    active = activity_chains(rng, len(source), num_snapshots, activity, persistence)
+    # with a very low activity some edges may stay inactive, these are dropped below
+    for _ in range(100):
+        idle = np.flatnonzero(~active.any(axis=0))
+        if len(idle) == 0:
+            break
+        active[:, idle] = activity_chains(rng, len(idle), num_snapshots, activity, persistence)
+
+    kept = active.any(axis=0)
+    names = node_names if num_nodes <= len(node_names) else None
+    g = Graph.from_edges(num_nodes, source[kept], target[kept], names)
+    for t in range(num_snapshots):
+        weights = rng.integers(1, max_weight + 1, g.num_edges)
+        g.edge_attributes['Season {}'.format(t + 1)] = Column('int', weights, active[t, kept])
+
+    data = g.to_node_link()
+    json.dump(data, open(filename, "w"))
+
+    return {'nodes': data["nodes"], 'links': data["links"]}
+
+
+if __name__ == '__main__':
+    # generate network file :
+    generate_data('248nodes.json', 248, 4, True, 0.025, 4, True)
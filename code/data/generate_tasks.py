@@ -3,74 +3,59 @@
 import json
 import random as rnd
 import itertools
-from generate_social_network import generate_data
 
+import numpy as np
 
-def get_adjacent_node_ids(network, node):
-    """
-    This function gets all adjacent node ids of the given node.
-    :param network:
-    :param node:
-    :return: node ids
-    """
-    return [e['source'] for e in network['links'] if e['target'] == node['id']] + [e['target'] for e in network['links']
-                                                                                   if e['source'] == node['id']]
+from generate_social_network import generate_data
+from graph import Graph
 
 
-def get_adjacent_nodes(network, node):
+def get_adjacent_nodes(g, node):
     """
-    This function gets all adjacent nodes of the given node.
-    :param network:
-    :param node:
-    :return: nodes
+    This function gets the positions of all adjacent nodes of the given node, in the order of the nodes in the network.
+    :param g: array-backed graph
+    :param node: node position
+    :return: node positions
     """
-    return [n for n in network['nodes'] if n['id'] in get_adjacent_node_ids(network, node)]
+    return np.unique(g.neighbors(node))
 
 
-def get_adjacent_edges(network, node):
+def get_adjacent_edges(g, node):
     """
-    This function gets all adjacent edges of the given node.
-    :param network:
-    :param node:
-    :return: edges
+    This function gets the positions of all adjacent edges of the given node.
+    :param g: array-backed graph
+    :param node: node position
+    :return: edge positions
     """
-    return [e for e in network['links'] if e['target'] == node['id'] or e['source'] == node['id']]
+    return g.incident_edges(node)
 
 
-def get_adjacent_nodes_with_second_highest_value(network, node, attribute):
+def get_adjacent_nodes_with_second_highest_value(g, node, attribute):
     """
     This function gets the adjacent nodes of the given node which edge has the second highest value on the given
     attribute.
-    :param network:
-    :param node:
+    :param g: array-backed graph
+    :param node: node position
     :param attribute:
-    :return: nodes
+    :return: node positions
     """
-    values = set([e['attributes'][attribute] for e in get_adjacent_edges(network, node)])
-    values.remove(max(values))
-    target = [e['target'] for e in network['links'] if e['source'] == node['id']
-              and e['attributes'][attribute] == max(values)] + \
-             [e['source'] for e in network['links'] if e['target'] == node['id']
-              and e['attributes'][attribute] == max(values)]
-
-    return [n for n in data['nodes'] if n['id'] in target]
+    values = g.edge_attributes[attribute].values[get_adjacent_edges(g, node)]
+    return np.unique(g.neighbors(node)[values == np.unique(values)[-2]])
 
 
-def get_adjacent_nodes_on_attribute_comparison(network, node, attributes):
+def get_adjacent_nodes_on_attribute_comparison(g, node, attributes):
     """
     This function gets the adjacent nodes of the given node which edge has a higher value in first than in the second
     attribute.
-    :param network:
-    :param node:
+    :param g: array-backed graph
+    :param node: node position
     :param attributes:
-    :return: nodes
+    :return: node positions
     """
-    adjacent = get_adjacent_edges(network, node)
-    target = [e for e in adjacent if e['attributes'][attributes[0]] > e['attributes'][attributes[1]]]
-    ids = [e['source'] for e in target if e['target'] == node['id']] + [e['target'] for e in target if
-                                                                        e['source'] == node['id']]
-
-    return [n for n in network['nodes'] if n['id'] in ids]
+    edges = get_adjacent_edges(g, node)
+    first = g.edge_attributes[attributes[0]].values[edges]
+    second = g.edge_attributes[attributes[1]].values[edges]
+    return np.unique(g.neighbors(node)[first > second])
 
 
 def generate_textual_solution(solution, conj):
@@ -90,38 +75,40 @@ def generate_task(data, taskType):
     :param taskType: plain, one or two
     :return: task
     """
-    node = rnd.choice(data['nodes'])
+    g = Graph.from_node_link(data)
+    node = rnd.randrange(g.num_nodes)
     # ensure that there are at least two adjacent edges
-    while len(get_adjacent_edges(data, node)) < 2:
-        node = rnd.choice(data['nodes'])
+    while len(get_adjacent_edges(g, node)) < 2:
+        node = rnd.randrange(g.num_nodes)
 
     if taskType == 'plain':
-        solution = get_adjacent_nodes(data, node)
-        return {'description': 'Find all friends of ' + node['name'] + '.', 'answer': 'multipleNodeSelection',
+        solution = [data['nodes'][i] for i in get_adjacent_nodes(g, node).tolist()]
+        return {'description': 'Find all friends of ' + g.name(node) + '.', 'answer': 'multipleNodeSelection',
                 'solution': solution, 'textSolution': generate_textual_solution(solution, 'and'), 'ordering': 'Nodes'}
 
     elif taskType == 'one':
         attribute = rnd.choice(['Years of Friendship', 'Distance', 'Interactions per Week', 'Common Hobbies'])
         # ensure that there are at least two different values for the chosen attribute
-        while len(set([e['attributes'][attribute] for e in get_adjacent_edges(data, node)])) < 2:
-            node = rnd.choice(data['nodes'])
+        while len(np.unique(g.edge_attributes[attribute].values[get_adjacent_edges(g, node)])) < 2:
+            node = rnd.randrange(g.num_nodes)
             attribute = rnd.choice(['Years of Friendship', 'Distance', 'Interactions per Week', 'Common Hobbies'])
 
-        solution = get_adjacent_nodes_with_second_highest_value(data, node, attribute)
-        return {'description': 'Find a friend of ' + node['name'] + ' whose friendship has the second highest value in '
+        solution = [data['nodes'][i] for i in get_adjacent_nodes_with_second_highest_value(g, node, attribute).tolist()]
+        return {'description': 'Find a friend of ' + g.name(node) + ' whose friendship has the second highest value in '
                                + attribute.lower() + ".", 'answer': 'nodeSelection', 'solution': solution,
                 'textSolution': generate_textual_solution(solution, 'or'), 'ordering': attribute}
 
     else:
         attributes = rnd.sample(['Years of Friendship', 'Distance', 'Interactions per Week', 'Common Hobbies'], k=2)
-        solution = get_adjacent_nodes_on_attribute_comparison(data, node, attributes)
+        solution = get_adjacent_nodes_on_attribute_comparison(g, node, attributes)
         # ensure that there are at least two adjacent edges and the solution includes at least one of them
-        while len(get_adjacent_edges(data, node)) < 2 or len(solution) < 1:
-            node = rnd.choice(data['nodes'])
+        while len(get_adjacent_edges(g, node)) < 2 or len(solution) < 1:
+            node = rnd.randrange(g.num_nodes)
             attributes = rnd.sample(['Years of Friendship', 'Distance', 'Interactions per Week', 'Common Hobbies'], k=2)
-            solution = get_adjacent_nodes_on_attribute_comparison(data, node, attributes)
+            solution = get_adjacent_nodes_on_attribute_comparison(g, node, attributes)
+        solution = [data['nodes'][i] for i in solution.tolist()]
 
-        return {'description': 'Find all friends of ' + node['name'] + ' whose friendship has more ' +
+        return {'description': 'Find all friends of ' + g.name(node) + ' whose friendship has more ' +
                                attributes[0].lower() + ' than ' + attributes[1].lower() + '.',
                 'answer': 'multipleNodeSelection', 'solution': solution,
                 'textSolution': generate_textual_solution(solution, 'and'), 'ordering': attributes}
@@ -0,0 +1,409 @@
+# This file provides a compact, array-backed graph model which is shared by the data scripts.
+
+import numpy as np
+
+# marker for a value which is not set on a node or edge
+MISSING = object()
+
+
+class Column:
+    """
+    This class stores one attribute of all nodes or all edges as a typed array. Integers, floats and booleans are kept
+    in a NumPy array, strings are interned into a label table and stored as integer codes. Any other value (e.g. the
+    coordinate lists of the 'hierarchy' and 'radial' layouts) falls back to an object array. Missing values are tracked
+    by a boolean mask. A float column which also contains integers (e.g. a 'clustering' of 0 next to 0.5) marks them in
+    a second mask, so that they are converted back to integers.
+    """
+    __slots__ = ('kind', 'values', 'present', 'labels', 'integral')
+
+    def __init__(self, kind, values, present, labels=None, integral=None):
+        self.kind = kind
+        self.values = values
+        self.present = present
+        self.labels = labels
+        self.integral = integral
+
+    @classmethod
+    def from_values(cls, values):
+        """
+        This function builds a column from a list of values in which unset entries are MISSING.
+        :param values: list of values
+        :return: column
+        """
+        present = np.fromiter((v is not MISSING for v in values), dtype=bool, count=len(values))
+        kinds = set(_kind(v) for v in values if v is not MISSING)
+
+        if kinds <= {'bool'}:
+            return cls('bool', np.array([v is not MISSING and v for v in values], dtype=bool), present)
+        if kinds <= {'int'}:
+            return cls('int', np.array([v if v is not MISSING else 0 for v in values], dtype=np.int64), present)
+        if kinds <= {'int', 'float'} and all(abs(v) <= 2 ** 53 for v in values if _kind(v) == 'int'):
+            integral = np.fromiter((_kind(v) == 'int' for v in values), dtype=bool, count=len(values))
+            return cls('float', np.array([v if v is not MISSING else np.nan for v in values], dtype=np.float64),
+                       present, integral=integral if integral.any() else None)
+        if kinds <= {'str'}:
+            labels, codes = intern([v if v is not MISSING else None for v in values])
+            return cls('str', codes, present, labels)
+
+        column = np.empty(len(values), dtype=object)
+        column[:] = [v if v is not MISSING else None for v in values]
+        return cls('object', column, present)
+
+    def __len__(self):
+        return len(self.values)
+
+    def get(self, i):
+        """
+        This function returns the value at the given position as a plain python value.
+        :param i: position
+        :return: value or MISSING
+        """
+        if not self.present[i]:
+            return MISSING
+        value = self.values[i]
+        if self.kind == 'str':
+            return self.labels[value]
+        if self.kind == 'object':
+            return value
+        if self.integral is not None and self.integral[i]:
+            return int(value)
+        return value.item()
+
+    def take(self, positions):
+        """
+        This function returns a new column containing the values at the given positions.
+        :param positions: array of positions
+        :return: column
+        """
+        integral = self.integral[positions] if self.integral is not None else None
+        return Column(self.kind, self.values[positions], self.present[positions], self.labels, integral)
+
+    @property
+    def nbytes(self):
+        return self.values.nbytes + self.present.nbytes + (self.integral.nbytes if self.integral is not None else 0)
+
+
+def _kind(value):
+    if isinstance(value, bool):
+        return 'bool'
+    if isinstance(value, (int, np.integer)):
+        return 'int'
+    if isinstance(value, (float, np.floating)):
+        return 'float'
+    if isinstance(value, str):
+        return 'str'
+    return 'object'
+
+
+def intern(values):
+    """
+    This function interns the given values: every distinct value is stored once in a label table and the values are
+    replaced by their integer code.
+    :param values: list of hashable values
+    :return: label table, array of codes
+    """
+    table = {}
+    codes = np.fromiter((table.setdefault(v, len(table)) for v in values), dtype=np.int32, count=len(values))
+    return list(table), codes
+
+
+def _columns(records, count, skip):
+    """
+    This function collects the values of all records per key and turns them into columns.
+    :param records: list of dicts
+    :param count: number of records
+    :param skip: keys which are not collected
+    :return: dict of columns
+    """
+    collected = {}
+    for i, record in enumerate(records):
+        for key, value in record.items():
+            if key in skip:
+                continue
+            if key not in collected:
+                collected[key] = [MISSING] * count
+            collected[key][i] = value
+    return {key: Column.from_values(values) for key, values in collected.items()}
+
+
+class Graph:
+    """
+    This class stores a network in a compact, array-backed form. Node ids are kept in an int array and edges refer to
+    nodes by their position in that array. Names are interned and attributes are stored as typed columns, so the
+    memory needed grows with the number of nodes and edges instead of the number of python dicts.
+    """
+    __slots__ = ('ids', 'name_labels', 'name_codes', 'source', 'target', 'node_attributes', 'edge_attributes',
+                 'node_fields', 'edge_fields', 'meta', '_order', '_csr')
+
+    def __init__(self, ids, name_labels, name_codes, source, target, node_attributes=None, edge_attributes=None,
+                 node_fields=None, edge_fields=None, meta=None):
+        self.ids = ids
+        self.name_labels = name_labels
+        self.name_codes = name_codes
+        self.source = source
+        self.target = target
+        self.node_attributes = node_attributes if node_attributes is not None else {}
+        self.edge_attributes = edge_attributes if edge_attributes is not None else {}
+        self.node_fields = node_fields if node_fields is not None else {}
+        self.edge_fields = edge_fields if edge_fields is not None else {}
+        self.meta = meta if meta is not None else {}
+        self._order = None
+        self._csr = None
+
+    @classmethod
+    def from_node_link(cls, data):
+        """
+        This function builds a graph from node-link data, i.e. a dict with 'nodes' and 'links' (or 'edges'). Entries
+        besides 'nodes' and 'links' (e.g. 'rcm') are kept in meta. Node ids have to be integers.
+        :param data: node-link data
+        :return: graph
+        """
+        nodes = data['nodes']
+        links = data['links'] if 'links' in data else data.get('edges', [])
+
+        ids = np.fromiter((n['id'] for n in nodes), dtype=np.int64, count=len(nodes))
+        name_labels, name_codes = intern([n.get('name', n['id']) for n in nodes])
+
+        g = cls(ids, name_labels, name_codes, np.empty(0, dtype=np.int32), np.empty(0, dtype=np.int32),
+                meta={k: v for k, v in data.items() if k not in ('nodes', 'links', 'edges')})
+        source = np.fromiter((e['source'] for e in links), dtype=np.int64, count=len(links))
+        target = np.fromiter((e['target'] for e in links), dtype=np.int64, count=len(links))
+        g.source = g.positions(source)
+        g.target = g.positions(target)
+
+        g.node_attributes = _columns([n.get('attributes', {}) for n in nodes], len(nodes), ())
+        g.node_fields = _columns(nodes, len(nodes), ('id', 'name', 'attributes'))
+        g.edge_attributes = _columns([e.get('attributes', {}) for e in links], len(links), ())
+        g.edge_fields = _columns(links, len(links), ('source', 'target', 'attributes'))
+
+        return g
+
+    @classmethod
+    def from_edges(cls, num_nodes, source, target, names=None):
+        """
+        This function builds a graph with the node ids 0..num_nodes-1 from arrays of edge endpoints.
+        :param num_nodes: number of nodes
+        :param source: array of source ids
+        :param target: array of target ids
+        :param names: list of node names (default: the node ids)
+        :return: graph
+        """
+        ids = np.arange(num_nodes, dtype=np.int64)
+        name_labels = list(names[:num_nodes]) if names is not None else ids.tolist()
+
+        return cls(ids, name_labels, np.arange(num_nodes, dtype=np.int32), np.asarray(source, dtype=np.int32),
+                   np.asarray(target, dtype=np.int32))
+
+    @classmethod
+    def from_networkx(cls, g):
+        """
+        This function builds a graph from a networkx graph whose nodes are integers.
+        :param g: networkx graph
+        :return: graph
+        """
+        nodes = [dict(data, id=n) for n, data in g.nodes(data=True)]
+        links = [dict(data, source=u, target=v) for u, v, data in g.edges(data=True)]
+        meta = {'directed': g.is_directed(), 'multigraph': g.is_multigraph(), 'graph': dict(g.graph)}
+
+        return cls.from_node_link(dict(meta, nodes=nodes, links=links))
+
+    def to_node_link(self):
+        """
+        This function converts the graph back to node-link data with 'attributes' on every node and edge.
+        :return: node-link data
+        """
+        ids = self.ids.tolist()
+        names = [self.name_labels[c] for c in self.name_codes.tolist()]
+        nodes = []
+        for i, (attributes, fields) in enumerate(zip(_records(self.node_attributes, self.num_nodes),
+                                                     _records(self.node_fields, self.num_nodes))):
+            node = {'id': ids[i], 'name': names[i], 'attributes': attributes}
+            node.update(fields)
+            nodes.append(node)
+
+        source = self.source.tolist()
+        target = self.target.tolist()
+        links = []
+        for j, (attributes, fields) in enumerate(zip(_records(self.edge_attributes, self.num_edges),
+                                                     _records(self.edge_fields, self.num_edges))):
+            edge = {'source': ids[source[j]], 'target': ids[target[j]], 'attributes': attributes}
+            edge.update(fields)
+            links.append(edge)
+
+        data = dict(self.meta)
+        data['nodes'] = nodes
+        data['links'] = links
+        return data
+
+    def to_networkx(self):
+        """
+        This function converts the graph to a networkx graph with the original node ids. Without a 'multigraph' entry
+        in meta, a multigraph is built if the graph has parallel edges, so that none of them is dropped.
+        :return: networkx graph
+        """
+        import networkx as nx
+
+        if self.meta.get('multigraph', self.has_parallel_edges()):
+            g = nx.MultiDiGraph() if self.meta.get('directed') else nx.MultiGraph()
+        else:
+            g = nx.DiGraph() if self.meta.get('directed') else nx.Graph()
+        g.graph.update(self.meta.get('graph', {}))
+
+        ids = self.ids.tolist()
+        for i, (attributes, fields) in enumerate(zip(_records(self.node_attributes, self.num_nodes),
+                                                     _records(self.node_fields, self.num_nodes))):
+            g.add_node(ids[i], name=self.name(i), attributes=attributes, **fields)
+        edges = zip(self.source.tolist(), self.target.tolist(), _records(self.edge_attributes, self.num_edges),
+                    _records(self.edge_fields, self.num_edges))
+        for u, v, attributes, fields in edges:
+            g.add_edge(ids[u], ids[v], attributes=attributes, **fields)
+
+        return g
+
+    def has_parallel_edges(self):
+        """
+        This function checks whether two edges connect the same nodes (in the same direction for directed graphs).
+        :return: boolean value
+        """
+        u, v = self.source.astype(np.int64), self.target.astype(np.int64)
+        if not self.meta.get('directed'):
+            u, v = np.minimum(u, v), np.maximum(u, v)
+        return len(np.unique(u * max(self.num_nodes, 1) + v)) < self.num_edges
+
+    @property
+    def num_nodes(self):
+        return len(self.ids)
+
+    @property
+    def num_edges(self):
+        return len(self.source)
+
+    def name(self, i):
+        return self.name_labels[self.name_codes[i]]
+
+    def node_attributes_of(self, i):
+        return _record(self.node_attributes, i)
+
+    def edge_attributes_of(self, j):
+        return _record(self.edge_attributes, j)
+
+    def positions(self, ids):
+        """
+        This function maps node ids to their positions in the graph.
+        :param ids: array of node ids
+        :return: array of positions
+        """
+        if self._order is None:
+            self._order = np.argsort(self.ids, kind='stable')
+        ids = np.asarray(ids, dtype=np.int64)
+        found = np.searchsorted(self.ids, ids, sorter=self._order)
+        found = np.minimum(found, max(len(self.ids) - 1, 0))
+        if len(ids) and (len(self.ids) == 0 or np.any(self.ids[self._order[found]] != ids)):
+            raise ValueError('unknown node id in {}'.format(ids[self.ids[self._order[found]] != ids][:5].tolist()))
+        return self._order[found].astype(np.int32)
+
+    def position(self, node_id):
+        return int(self.positions([node_id])[0])
+
+    def csr(self):
+        """
+        This function returns the undirected adjacency of the graph in compressed sparse row form. The neighbors of
+        node i are indices[indptr[i]:indptr[i + 1]] and the connecting edges are edges[indptr[i]:indptr[i + 1]].
+        :return: indptr, indices, edges
+        """
+        if self._csr is None:
+            heads = np.concatenate([self.source, self.target])
+            tails = np.concatenate([self.target, self.source])
+            edges = np.concatenate([np.arange(self.num_edges, dtype=np.int32)] * 2)
+            order = np.argsort(heads, kind='stable')
+            indptr = np.zeros(self.num_nodes + 1, dtype=np.int64)
+            np.cumsum(np.bincount(heads, minlength=self.num_nodes), out=indptr[1:])
+            self._csr = (indptr, tails[order], edges[order])
+        return self._csr
+
+    def neighbors(self, i):
+        indptr, indices, _ = self.csr()
+        return indices[indptr[i]:indptr[i + 1]]
+
+    def incident_edges(self, i):
+        indptr, _, edges = self.csr()
+        return edges[indptr[i]:indptr[i + 1]]
+
+    def degree(self):
+        return np.bincount(np.concatenate([self.source, self.target]), minlength=self.num_nodes)
+
+    def subgraph(self, positions):
+        """
+        This function returns the subgraph induced by the nodes at the given positions.
+        :param positions: array of node positions
+        :return: graph
+        """
+        positions = np.asarray(positions, dtype=np.int64)
+        mapping = np.full(self.num_nodes, -1, dtype=np.int64)
+        mapping[positions] = np.arange(len(positions))
+        kept = np.flatnonzero((mapping[self.source] >= 0) & (mapping[self.target] >= 0))
+
+        return self._select(positions, kept, mapping)
+
+    def edge_subgraph(self, edges):
+        """
+        This function returns the graph consisting of the edges at the given positions and all nodes.
+        :param edges: array of edge positions
+        :return: graph
+        """
+        return self._select(np.arange(self.num_nodes), np.asarray(edges, dtype=np.int64),
+                            np.arange(self.num_nodes))
+
+    def _select(self, positions, edges, mapping):
+        return Graph(self.ids[positions], self.name_labels, self.name_codes[positions],
+                     mapping[self.source[edges]].astype(np.int32), mapping[self.target[edges]].astype(np.int32),
+                     {k: c.take(positions) for k, c in self.node_attributes.items()},
+                     {k: c.take(edges) for k, c in self.edge_attributes.items()},
+                     {k: c.take(positions) for k, c in self.node_fields.items()},
+                     {k: c.take(edges) for k, c in self.edge_fields.items()},
+                     {k: v for k, v in self.meta.items() if k != 'rcm'})
+
+    @property
+    def nbytes(self):
+        """
+        This function estimates the memory used by the arrays of the graph (the interned name table is not counted).
+        :return: bytes
+        """
+        tables = [self.node_attributes, self.edge_attributes, self.node_fields, self.edge_fields]
+        return self.ids.nbytes + self.name_codes.nbytes + self.source.nbytes + self.target.nbytes + \
+            sum(c.nbytes for columns in tables for c in columns.values())
+
+
+def _record(columns, i):
+    """
+    This function collects the set values of the given columns at position i into a dict.
+    """
+    record = {}
+    for key, column in columns.items():
+        value = column.get(i)
+        if value is not MISSING:
+            record[key] = value
+    return record
+
+
+def _records(columns, count):
+    """
+    This function yields the set values of the given columns as one dict per position. The columns are converted to
+    python lists first, which is much faster than reading them value by value.
+    :param columns: dict of columns
+    :param count: number of positions
+    :return: generator of dicts
+    """
+    lists = []
+    for key, column in columns.items():
+        if column.kind == 'str':
+            values = [column.labels[c] for c in column.values.tolist()]
+        elif column.integral is not None:
+            values = [int(v) if integral else v for v, integral in zip(column.values.tolist(),
+                                                                         column.integral.tolist())]
+        else:
+            values = column.values.tolist()
+        lists.append((key, values, column.present.tolist()))
+
+    for i in range(count):
+        yield {key: values[i] for key, values, present in lists if present[i]}
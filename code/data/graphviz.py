@@ -1,8 +1,9 @@
 import json
 import os
 import pygraphviz as pgv
+from loader import load
 
-root = os.path.dirname(__file__)
+root = os.path.dirname(os.path.abspath(__file__))
 path = os.path.join(root, 'boardgames/preprocessed')
 
 def norm(val, min, max):
@@ -12,7 +13,7 @@ i = 0
 for file in os.listdir(os.fsencode(path)):
     filename = os.fsdecode(file)
     if filename.endswith('100.json'):
-        data = json.load(open(os.path.join(path, filename)))
+        data = load(os.path.join(path, filename), copy=True)
         ids = [n['id'] for n in data['nodes']]
         dot = "graph {\n"
         for link in data['links']:
@@ -0,0 +1,243 @@
+# This file precomputes force-directed node positions and stores them as normalized [x, y], like 'hierarchy'.
+# usage: python layout.py <dataset or directory> [...]
+
+import sys
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from loader import datasets, update_nodes
+
+
+def repulsion(positions, k, max_exact=32):
+    """
+    This function computes the repulsive forces with a grid: nodes are sorted into cells of size 2k, every node is
+    repelled exactly by each other node in its own and the eight neighboring cells and by the center of mass of the
+    cells around those, weighted by the number of nodes in them. Nodes further away are ignored. Cells with more than
+    max_exact nodes, e.g. around hubs in the first iterations of a level, also repel by their center of mass, which
+    keeps the cost linear in the number of nodes. Nodes at the same position are pushed apart in a direction derived
+    from their indices, so that they separate as well.
+    :param positions: array of shape (nodes, 2)
+    :param k: optimal distance between nodes
+    :param max_exact: maximum number of nodes in a cell whose forces are computed exactly
+    :return: array of displacements of shape (nodes, 2)
+    """
+    n = len(positions)
+    keys = np.floor(positions / (2 * k)).astype(np.int64)
+    kx = keys[:, 0] - keys[:, 0].min() + 2
+    ky = keys[:, 1] - keys[:, 1].min() + 2
+    span = ky.max() + 3
+    cells, cell_of = np.unique(kx * span + ky, return_inverse=True)
+    cell_of = cell_of.reshape(-1)
+    mass = np.bincount(cell_of, minlength=len(cells))
+    total = np.stack([np.bincount(cell_of, weights=positions[:, axis], minlength=len(cells)) for axis in range(2)], 1)
+    centers = total / mass[:, None]
+
+    # the nodes of cell c are members[first[c]:first[c] + mass[c]]
+    members = np.argsort(cell_of, kind='stable')
+    first = np.cumsum(mass) - mass
+
+    displacement = np.zeros((n, 2))
+    for dx in range(-2, 3):
+        for dy in range(-2, 3):
+            # look the neighboring cells up once per cell instead of once per node
+            neighbor = cells + dx * span + dy
+            found = np.minimum(np.searchsorted(cells, neighbor), len(cells) - 1)
+            found = np.where(cells[found] == neighbor, found, -1)[cell_of]
+            m = np.where(found >= 0, mass[found], 0)
+            exact = (m > 0) & (m <= max_exact) & (max(abs(dx), abs(dy)) < 2)
+
+            # the center of mass of the cells further away and of crowded ones
+            if dx == 0 and dy == 0:
+                # a node does not repel itself
+                m = m - 1
+                center = (total[cell_of] - positions) / np.maximum(m, 1)[:, None]
+            else:
+                center = centers[found]
+            delta = positions - center
+            factor = np.where(exact, 0, m) * k * k / np.maximum((delta * delta).sum(axis=1), 1e-6 * k * k)
+            displacement += delta * factor[:, None]
+
+            # every other node of the neighboring cell
+            nodes = np.flatnonzero(exact)
+            count = mass[found[nodes]]
+            i = np.repeat(nodes, count)
+            j = members[np.repeat(first[found[nodes]] - np.cumsum(count) + count, count) + np.arange(len(i))]
+            i, j = i[i != j], j[i != j]
+
+            delta = positions[i] - positions[j]
+            distance2 = (delta * delta).sum(axis=1)
+            same = distance2 < 1e-12 * k * k
+            angle = (i[same] + j[same]) * 2.399963
+            delta[same] = 1e-3 * k * np.sign(i[same] - j[same])[:, None] * np.stack([np.cos(angle), np.sin(angle)], 1)
+            force = delta * (k * k / np.maximum((delta * delta).sum(axis=1), 1e-6 * k * k))[:, None]
+            for axis in range(2):
+                displacement[:, axis] += np.bincount(i, weights=force[:, axis], minlength=n)
+
+    return displacement
+
+
+def attraction(positions, source, target, k):
+    """
+    This function computes the attractive forces along the edges.
+    :param positions: array of shape (nodes, 2)
+    :param source: array of source nodes
+    :param target: array of target nodes
+    :param k: optimal distance between nodes
+    :return: array of displacements of shape (nodes, 2)
+    """
+    n = len(positions)
+    delta = positions[source] - positions[target]
+    distance = np.maximum(np.hypot(delta[:, 0], delta[:, 1]), 1e-9)
+    force = (distance / k)[:, None] * delta
+
+    displacement = np.zeros((n, 2))
+    for axis in range(2):
+        displacement[:, axis] = np.bincount(target, weights=force[:, axis], minlength=n) - \
+                                np.bincount(source, weights=force[:, axis], minlength=n)
+    return displacement
+
+
+def fruchterman_reingold(positions, source, target, iterations, temperature, gravity=0.01):
+    """
+    This function runs a vectorized Fruchterman-Reingold simulation with grid-based repulsion and a linear cooling
+    schedule. The optimal distance between nodes is 1.
+    :param positions: array of initial positions of shape (nodes, 2)
+    :param source: array of source nodes
+    :param target: array of target nodes
+    :param iterations: number of iterations
+    :param temperature: maximum displacement in the first iteration
+    :param gravity: strength of the pull towards the center, which keeps components together
+    :return: array of positions of shape (nodes, 2)
+    """
+    positions = positions.copy()
+    for step in range(iterations):
+        displacement = repulsion(positions, 1.0) + attraction(positions, source, target, 1.0)
+        displacement -= gravity * (positions - positions.mean(axis=0))
+
+        length = np.maximum(np.hypot(displacement[:, 0], displacement[:, 1]), 1e-9)
+        limit = temperature * (1 - step / iterations)
+        positions += displacement * (np.minimum(length, limit) / length)[:, None]
+
+    return positions
+
+
+def coarsen(num_nodes, source, target, rng):
+    """
+    This function merges nodes for the multilevel layout. Every node gets a random priority; nodes with a higher
+    priority than all their neighbors become centers. Every other node joins its neighboring center of highest
+    priority or, if it has none, the group of its neighbor of highest priority.
+    :param num_nodes: number of nodes
+    :param source: array of source nodes
+    :param target: array of target nodes
+    :param rng: numpy random generator
+    :return: number of coarse nodes, coarse node of each node, coarse source and target nodes
+    """
+    priority = rng.random(num_nodes)
+    rows = np.concatenate([source, target])
+    cols = np.concatenate([target, source])
+
+    best = np.full(num_nodes, -1.0)
+    np.maximum.at(best, rows, priority[cols])
+    center = priority > best
+
+    # neighbors which are centers come first, then the neighbor with the highest priority
+    order = np.lexsort((priority[cols], center[cols], rows))
+    rows, cols = rows[order], cols[order]
+    last = np.flatnonzero(np.r_[rows[1:] != rows[:-1], True])
+
+    parent = np.arange(num_nodes)
+    joining = rows[last][~center[rows[last]]]
+    parent[joining] = cols[last][~center[rows[last]]]
+    # priorities grow along the parents, so following them ends at a center
+    while True:
+        grand = parent[parent]
+        if np.array_equal(grand, parent):
+            break
+        parent = grand
+
+    coarse_ids, mapping = np.unique(parent, return_inverse=True)
+    u, v = mapping[source], mapping[target]
+    u, v = np.minimum(u, v), np.maximum(u, v)
+    count = len(coarse_ids)
+    keys = np.unique((u * count + v)[u != v])
+
+    return count, mapping, keys // count, keys % count
+
+
+def force_layout(g, iterations=100, multilevel=True, min_nodes=64, seed=0):
+    """
+    This function computes a force-directed layout of a graph and normalizes it to [0, 1] in both axes. With
+    multilevel, the graph is coarsened repeatedly, the coarsest graph is laid out first and each finer level starts
+    from the positions of the coarser one, so large graphs need only a few iterations per level.
+    :param g: array-backed graph
+    :param iterations: number of iterations on the coarsest level (finer levels use a quarter of them)
+    :param multilevel: use multilevel coarsening
+    :param min_nodes: coarsening stops below this number of nodes
+    :param seed: seed of the random generator
+    :return: array of positions of shape (nodes, 2)
+    """
+    if g.num_nodes == 0:
+        return np.empty((0, 2))
+    rng = np.random.default_rng(seed)
+    loops = g.source == g.target
+    levels = [(g.num_nodes, g.source[~loops].astype(np.int64), g.target[~loops].astype(np.int64))]
+    mappings = []
+    while multilevel and levels[-1][0] > min_nodes:
+        n, source, target = levels[-1]
+        count, mapping, coarse_source, coarse_target = coarsen(n, source, target, rng)
+        if count > 0.9 * n:
+            break
+        levels.append((count, coarse_source, coarse_target))
+        mappings.append(mapping)
+
+    n, source, target = levels[-1]
+    positions = rng.random((n, 2)) * np.sqrt(n)
+    positions = fruchterman_reingold(positions, source, target, iterations, np.sqrt(n) / 10)
+
+    for (n, source, target), mapping in zip(reversed(levels[:-1]), reversed(mappings)):
+        # the natural size of a layout grows with the square root of the number of nodes
+        scale = np.sqrt(n / len(positions))
+        positions = positions[mapping] * scale + rng.normal(scale=0.1, size=(n, 2))
+        positions = fruchterman_reingold(positions, source, target, max(iterations // 4, 10), 2.0)
+
+    return normalize(positions)
+
+
+def normalize(positions):
+    """
+    This function scales positions to [0, 1] in both axes.
+    :param positions: array of shape (nodes, 2)
+    :return: array of shape (nodes, 2)
+    """
+    if len(positions) == 0:
+        return positions
+    low, high = positions.min(axis=0), positions.max(axis=0)
+    extent = np.where(high > low, high - low, 1)
+    return np.where(high > low, (positions - low) / extent, 0.5)
+
+
+def add_layout(name, key='force'):
+    """
+    This function computes the force-directed layout of a dataset and writes the position of each node to the given key.
+    Nodes drawn on top of each other could not be told apart, so a layout with coincident positions is an error.
+    :param name: dataset name
+    :param key: node key of the positions
+    :return: dataset name or None if it was skipped
+    """
+    def update(g):
+        positions = force_layout(g)
+        if len(np.unique(positions, axis=0)) < len(positions):
+            raise RuntimeError('coincident node positions in the layout of {}'.format(name))
+        return {key: positions.tolist()}, name
+
+    return update_nodes(name, update)
+
+
+if __name__ == '__main__':
+    if len(sys.argv) < 2:
+        sys.exit('usage: python layout.py <dataset or directory> [...]')
+    with ProcessPoolExecutor() as executor:
+        for dataset in executor.map(add_layout, datasets(*sys.argv[1:])):
+            if dataset is not None:
+                print('{}: layout written'.format(dataset))
@@ -0,0 +1,287 @@
+# This file provides a shared, cached loader for the datasets in the data tree.
+
+import hashlib
+import json
+import os
+import pickle
+import re
+import sys
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+from graph import Graph
+
+root = os.path.dirname(os.path.abspath(__file__))
+cache_dir = os.path.join(root, '.cache')
+# invalid datasets for the validator, which are not expanded from directories
+tests_dir = os.path.join(root, 'tests')
+
+# number of parsed datasets kept in memory
+max_entries = 64
+
+_memory = OrderedDict()
+_lock = threading.Lock()
+
+
+def resolve(name):
+    """
+    This function resolves a dataset name to a file. Relative names are resolved against the data root and the
+    extension '.json' may be omitted, e.g. 'london', 'tasks/survey/20_0.1_one.json' or an absolute path.
+    :param name: dataset name
+    :return: absolute path of the file
+    """
+    path = name if os.path.isabs(name) else os.path.join(root, name)
+    if not os.path.isfile(path) and os.path.isfile(path + '.json'):
+        path = path + '.json'
+    if not os.path.isfile(path):
+        raise FileNotFoundError('no dataset {} in {}'.format(name, root))
+    return os.path.normpath(path)
+
+
+def digest(path):
+    """
+    This function computes the hash of the contents of a file.
+    :param path: file
+    :return: hex digest
+    """
+    h = hashlib.sha1()
+    with open(path, 'rb') as file:
+        for block in iter(lambda: file.read(1 << 20), b''):
+            h.update(block)
+    return h.hexdigest()
+
+
+# the pickled graphs depend on the classes in graph.py, so entries written with another version of it are ignored
+cache_version = digest(os.path.join(root, 'graph.py'))
+
+
+def _cache_file(path, form):
+    return os.path.join(cache_dir, hashlib.sha1(path.encode()).hexdigest() + '.' + form + '.pickle')
+
+
+def _read_cache(path, form, stat):
+    """
+    This function reads the binary form of a file from the on-disk cache. The entry is valid if it was written with
+    the current graph.py and the modification time and size of the file are unchanged, or if its contents still have
+    the same hash (e.g. after a checkout). An entry which cannot be read is treated as missing.
+    :return: parsed data or None
+    """
+    cached = _cache_file(path, form)
+    if not os.path.exists(cached):
+        return None
+    try:
+        with open(cached, 'rb') as file:
+            version, mtime, size, hashed = pickle.load(file)
+            if version != cache_version:
+                return None
+            if (mtime, size) != (stat.st_mtime_ns, stat.st_size):
+                if size != stat.st_size or hashed != digest(path):
+                    return None
+                data = pickle.load(file)
+                _write_cache(path, form, stat, hashed, data)
+                return data
+            return pickle.load(file)
+    except Exception:
+        # e.g. a truncated entry, an old header or a class which no longer unpickles
+        return None
+
+
+def _write_cache(path, form, stat, hashed, data):
+    os.makedirs(cache_dir, exist_ok=True)
+    cached = _cache_file(path, form)
+    # write to a temporary file first, so concurrent readers never see a partial entry
+    tmp = '{}.{}.{}'.format(cached, os.getpid(), threading.get_ident())
+    with open(tmp, 'wb') as file:
+        pickle.dump((cache_version, stat.st_mtime_ns, stat.st_size, hashed), file, protocol=pickle.HIGHEST_PROTOCOL)
+        pickle.dump(data, file, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(tmp, cached)
+
+
+def _load(name, form, parse, disk=True):
+    path = resolve(name)
+    stat = os.stat(path)
+    key = (path, form)
+
+    with _lock:
+        entry = _memory.get(key)
+        if entry is not None and entry[0] == (stat.st_mtime_ns, stat.st_size):
+            _memory.move_to_end(key)
+            return entry[1]
+
+    data = _read_cache(path, form, stat) if disk else None
+    if data is None:
+        data = parse(path)
+        if disk:
+            _write_cache(path, form, stat, digest(path), data)
+
+    with _lock:
+        _memory[key] = ((stat.st_mtime_ns, stat.st_size), data)
+        _memory.move_to_end(key)
+        while len(_memory) > max_entries:
+            _memory.popitem(last=False)
+
+    return data
+
+
+def _parse_json(path):
+    with open(path) as file:
+        return json.load(file)
+
+
+def load(name, copy=False):
+    """
+    This function loads a JSON dataset. Parsed datasets are kept in memory, but not on disk: unpickling a tree of dicts
+    takes about as long as parsing the JSON. Scripts which read large node-link datasets repeatedly should use
+    load_graph, whose array form is cached on disk. The returned data is shared between callers; pass copy=True before
+    modifying it, which parses the file again as that is faster than copying the parsed data.
+    :param name: dataset name
+    :param copy: return a private copy
+    :return: parsed data
+    """
+    if copy:
+        return _parse_json(resolve(name))
+    return _load(name, 'json', _parse_json, disk=False)
+
+
+def load_graph(name):
+    """
+    This function loads a node-link dataset as an array-backed graph. The graph is kept in memory and cached on disk,
+    which makes repeated loads much faster than parsing the JSON again.
+    :param name: dataset name
+    :return: graph
+    """
+    return _load(name, 'graph', lambda path: Graph.from_node_link(_parse_json(path)))
+
+
+def load_all(names, graph=False, workers=8):
+    """
+    This function loads several datasets concurrently.
+    :param names: dataset names
+    :param graph: load the datasets as array-backed graphs
+    :param workers: number of threads
+    :return: dict of name -> data
+    """
+    names = list(dict.fromkeys(names))
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        loaded = executor.map(load_graph if graph else load, names)
+        return dict(zip(names, loaded))
+
+
+# strings (group 1, group 2 if followed by a colon, i.e. a key), brackets and an unterminated string
+_tokens = re.compile(r'"([^"\\]*(?:\\.[^"\\]*)*)"(\s*:)?|[{}\[\]]|"')
+
+
+def is_node_link(path, chunk_size=1 << 20):
+    """
+    This function checks whether a JSON file contains an object with a 'nodes' key. The file is tokenized chunk by
+    chunk, only strings and brackets are looked at and the scan stops at the key, so the file is not parsed and
+    usually only its first chunk is read.
+    :param path: file
+    :param chunk_size: number of characters read at once
+    :return: boolean value
+    """
+    depth = 0
+    buffer = ''
+    with open(path, encoding='utf-8') as file:
+        while True:
+            chunk = file.read(chunk_size)
+            end = not chunk
+            buffer += chunk
+            if depth == 0 and buffer.strip() and buffer.lstrip()[0] != '{':
+                return False
+
+            consumed = 0
+            # a token at the end of the chunk may continue in the next one (e.g. a string or a key and its colon)
+            limit = len(buffer.rstrip())
+            for match in _tokens.finditer(buffer):
+                token = match.group(0)
+                if not end and (token == '"' or match.end() >= limit):
+                    break
+                consumed = match.end()
+                if token == '"':
+                    return False
+                if token in ('{', '['):
+                    depth += 1
+                elif token in ('}', ']'):
+                    depth -= 1
+                    if depth == 0:
+                        return False
+                elif depth == 1 and match.group(2) and match.group(1) == 'nodes':
+                    return True
+
+            buffer = buffer[consumed:]
+            if end:
+                return False
+
+
+def datasets(*names):
+    """
+    This function expands dataset names into node-link datasets. Directories are searched recursively for JSON files
+    which contain 'nodes' (see is_node_link); the on-disk cache and the validator fixtures in tests are skipped.
+    :param names: dataset names or directories (default: the whole data tree)
+    :return: list of absolute paths
+    """
+    found = []
+    for name in names or [root]:
+        path = os.path.normpath(name if os.path.isabs(name) else os.path.join(root, name))
+        if os.path.isfile(path) or os.path.isfile(path + '.json') or not os.path.isdir(path):
+            found.append(resolve(name))
+            continue
+        for directory, subdirectories, files in os.walk(path):
+            skipped = (cache_dir, tests_dir)
+            subdirectories[:] = sorted(d for d in subdirectories if os.path.join(directory, d) not in skipped)
+            for filename in sorted(files):
+                if filename.endswith('.json') and is_node_link(os.path.join(directory, filename)):
+                    found.append(os.path.normpath(os.path.join(directory, filename)))
+    return found
+
+
+def update_nodes(name, update):
+    """
+    This function computes values for the nodes of a dataset and writes them to its file. update is called with the
+    array-backed graph and returns a dict of node key -> list of values in node order and a result; the keys are set
+    on each node and the file is replaced with the same indentation. A dataset which cannot be loaded, e.g. an invalid
+    one, is reported on stderr and left unchanged, so that a run over a directory does not stop at it; errors raised
+    by update are not caught.
+    :param name: dataset name
+    :param update: function of the graph returning the values and the result
+    :return: result of update or None if the dataset was skipped
+    """
+    try:
+        g = load_graph(name)
+        path = resolve(name)
+        with open(path) as file:
+            text = file.read()
+        data = json.loads(text)
+    except (ValueError, KeyError, TypeError) as error:
+        print('skipping {}: {}'.format(name, error), file=sys.stderr)
+        return None
+
+    values, result = update(g)
+
+    for key, column in values.items():
+        for node, value in zip(data['nodes'], column):
+            node[key] = value
+
+    # keep the indentation and the final newline of the file, large generated datasets have no indentation
+    indent = re.search(r'\n([ \t]*)\S', text.strip())
+    indent = indent.group(1) if indent else None
+    # write to a temporary file first, so an interrupted run never leaves a truncated dataset
+    tmp = '{}.{}'.format(path, os.getpid())
+    with open(tmp, 'w') as outfile:
+        outfile.write(json.dumps(data, indent=indent) + text[len(text.rstrip()):])
+    os.replace(tmp, path)
+    return result
+
+
+def clear(disk=False):
+    """
+    This function empties the in-memory cache and, optionally, the on-disk cache.
+    :param disk: also remove the on-disk cache
+    """
+    with _lock:
+        _memory.clear()
+    if disk and os.path.isdir(cache_dir):
+        for filename in os.listdir(cache_dir):
+            os.remove(os.path.join(cache_dir, filename))
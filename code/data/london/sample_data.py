@@ -1,15 +1,17 @@
 # This file samples the network data of london's gangs.
+import os
 import random
+import sys
 
 import json
 
-with open('london.json','r') as file:
-    data = json.loads(file.read())
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from loader import load_graph
 
-nodes = random.sample(data['nodes'], 20)
-ids = [n['id'] for n in nodes]
-edges = [e for e in data['links'] if e['source'] in ids and e['target'] in ids]
+g = load_graph('london.json')
+
+sample = g.subgraph(random.sample(range(g.num_nodes), 20))
 
 with open('london_sample.json', 'w') as outfile:
-    json.dump({'nodes': nodes, 'links': edges}, outfile, indent=4)
-    outfile.close()
\ No newline at end of file
+    json.dump(sample.to_node_link(), outfile, indent=4)
+    outfile.close()
@@ -0,0 +1,261 @@
+# This file computes node orderings with sparse linear algebra and stores them as node ranks, like 'gansner'.
+# usage: python ordering.py <dataset or directory> [...]
+
+import sys
+from concurrent.futures import ProcessPoolExecutor
+import warnings
+
+import numpy as np
+from scipy.cluster.hierarchy import leaves_list, linkage, optimal_leaf_ordering
+from scipy.cluster.vq import kmeans2
+from scipy.linalg import eigh
+from scipy.sparse import csr_matrix, diags
+from scipy.sparse.csgraph import connected_components, laplacian
+from scipy.sparse.linalg import ArpackNoConvergence, eigsh, lobpcg
+
+from loader import datasets, update_nodes
+
+# components up to this size are solved with a dense eigensolver
+dense_limit = 500
+
+
+def adjacency(g):
+    """
+    This function builds the symmetric 0/1 adjacency matrix of a graph without self-loops.
+    :param g: array-backed graph
+    :return: sparse matrix
+    """
+    loops = g.source == g.target
+    rows = np.concatenate([g.source[~loops], g.target[~loops]])
+    cols = np.concatenate([g.target[~loops], g.source[~loops]])
+    a = csr_matrix((np.ones(len(rows)), (rows, cols)), shape=(g.num_nodes, g.num_nodes))
+    a.data[:] = 1.0
+    return a
+
+
+def components(a):
+    """
+    This function splits a graph into its connected components, largest first.
+    :param a: adjacency matrix
+    :return: list of arrays of node positions
+    """
+    if a.shape[0] == 0:
+        return []
+    count, labels = connected_components(a, directed=False)
+    order = np.argsort(labels, kind='stable')
+    parts = np.split(order, np.cumsum(np.bincount(labels, minlength=count))[:-1])
+    return sorted(parts, key=lambda part: (-len(part), part[0]))
+
+
+def spectral_embedding(a, dimensions, rng):
+    """
+    This function embeds a connected graph with the eigenvectors of the smallest non-zero eigenvalues of its laplacian,
+    scaled by the inverse square root of the eigenvalues. The first coordinate is the Fiedler vector.
+    :param a: adjacency matrix of a connected graph
+    :param dimensions: number of eigenvectors
+    :param rng: numpy random generator
+    :return: array of shape (nodes, dimensions)
+    """
+    n = a.shape[0]
+    dimensions = min(dimensions, n - 1)
+    lap = laplacian(a).tocsr()
+
+    if n <= dense_limit:
+        values, vectors = eigh(lap.toarray())
+        values, vectors = values[1:dimensions + 1], vectors[:, 1:dimensions + 1]
+    else:
+        # the constant vector spans the null space of the laplacian, so it is excluded by a constraint; whether the
+        # result is good enough is decided by the residual check below instead of the warning of lobpcg
+        degree = np.asarray(a.sum(axis=1)).ravel()
+        with warnings.catch_warnings():
+            warnings.simplefilter('ignore', UserWarning)
+            values, vectors = lobpcg(lap, rng.standard_normal((n, dimensions)), Y=np.ones((n, 1)),
+                                     M=diags(1 / np.maximum(degree, 1)), largest=False, tol=1e-5, maxiter=200)
+        if not converged(lap, values, vectors):
+            values, vectors = shift_invert(lap, values, vectors, dimensions)
+        order = np.argsort(values)
+        values, vectors = values[order], vectors[:, order]
+
+    return vectors / np.sqrt(np.maximum(values, 1e-12))
+
+
+def converged(lap, values, vectors, tolerance=1e-2):
+    """
+    This function checks eigenpairs of a laplacian: the residual of each pair has to be small compared to its
+    eigenvalue, otherwise the vector is still mixed with its neighbors in the spectrum. Graphs with a small spectral
+    gap, e.g. long paths, fail this after the iterations of lobpcg.
+    :param lap: laplacian
+    :param values: array of eigenvalues
+    :param vectors: array of eigenvectors of shape (nodes, k)
+    :param tolerance: largest accepted ratio of residual and eigenvalue
+    :return: boolean value
+    """
+    residual = np.linalg.norm(lap @ vectors - vectors * values, axis=0) / np.linalg.norm(vectors, axis=0)
+    return bool(np.all(residual <= tolerance * np.abs(values)))
+
+
+def shift_invert(lap, values, vectors, dimensions, shift=1e-9):
+    """
+    This function computes the eigenpairs of the smallest non-zero eigenvalues of a laplacian with shift-invert
+    Lanczos, which converges regardless of the spectral gap but factorizes the shifted laplacian. The shift is
+    negative, so the factorization exists and the order of the eigenvalues is kept. If it does not converge, the given
+    approximation is kept and a warning is issued.
+    :param lap: laplacian of a connected graph
+    :param values: array of approximate eigenvalues
+    :param vectors: array of approximate eigenvectors
+    :param dimensions: number of eigenvectors
+    :return: array of eigenvalues, array of eigenvectors
+    """
+    try:
+        found, found_vectors = eigsh(lap.tocsc(), k=dimensions + 1, sigma=-shift, which='LM')
+    except ArpackNoConvergence:
+        warnings.warn('spectral embedding of {} nodes did not converge, the ordering is approximate'.format(
+            lap.shape[0]))
+        return values, vectors
+    # the smallest eigenvalue belongs to the constant vector
+    order = np.argsort(found)[1:]
+    return found[order], found_vectors[:, order]
+
+
+def _oriented(values, part):
+    # eigenvectors have no sign, so flip them to let the node at the lowest position come first
+    return -values if values[np.argmin(part)] > values[np.argmax(part)] else values
+
+
+def spectral_ordering(g, seed=0):
+    """
+    This function orders the nodes of each connected component by their value in the Fiedler vector. Components are
+    placed one after another, the largest first.
+    :param g: array-backed graph
+    :param seed: seed of the random start of the eigensolver
+    :return: array of node positions in order
+    """
+    rng = np.random.default_rng(seed)
+    a = adjacency(g)
+    order = []
+    for part in components(a):
+        if len(part) <= 2:
+            order.append(part)
+            continue
+        fiedler = _oriented(spectral_embedding(a[part][:, part], 1, rng)[:, 0], part)
+        order.append(part[np.lexsort((part, fiedler))])
+    return np.concatenate(order) if order else np.empty(0, dtype=np.int64)
+
+
+def edge_span(g, rank):
+    """
+    This function computes the sum of the distances of the endpoints of all edges in an ordering.
+    :param g: array-backed graph
+    :param rank: array of the rank of each node
+    :return: total edge span
+    """
+    return int(np.abs(rank[g.source].astype(np.int64) - rank[g.target]).sum())
+
+
+def ranks(order):
+    rank = np.empty(len(order), dtype=np.int64)
+    rank[order] = np.arange(len(order))
+    return rank
+
+
+def barycenter_ordering(g, initial=None, iterations=20, method='barycenter'):
+    """
+    This function improves an ordering by repeatedly moving every node to the barycenter (mean) or median of the ranks
+    of its neighbors. The ordering with the smallest total edge span is returned.
+    :param g: array-backed graph
+    :param initial: array of node positions in order (default: spectral ordering)
+    :param iterations: number of iterations
+    :param method: 'barycenter' or 'median'
+    :return: array of node positions in order
+    """
+    if method not in ('barycenter', 'median'):
+        raise ValueError('unknown method {}'.format(method))
+    order = np.asarray(initial) if initial is not None else spectral_ordering(g)
+    rank = ranks(order)
+    best, best_span = order, edge_span(g, rank)
+
+    indptr, indices, _ = g.csr()
+    degree = np.diff(indptr)
+    rows = np.repeat(np.arange(g.num_nodes), degree)
+    connected = degree > 0
+    for _ in range(iterations):
+        values = rank[indices].astype(np.float64)
+        if method == 'barycenter':
+            target = np.bincount(rows, weights=values, minlength=g.num_nodes) / np.maximum(degree, 1)
+        else:
+            values = values[np.lexsort((values, rows))]
+            low = indptr[:-1] + np.maximum(degree - 1, 0) // 2
+            high = indptr[:-1] + degree // 2
+            target = np.zeros(g.num_nodes)
+            target[connected] = (values[low[connected]] + values[high[connected]]) / 2
+        target = np.where(connected, target, rank)
+
+        # ties keep their previous relative order
+        order = np.lexsort((rank, target))
+        rank = ranks(order)
+        span = edge_span(g, rank)
+        if span < best_span:
+            best, best_span = order, span
+
+    return best
+
+
+def leaf_order_ordering(g, dimensions=4, max_leaves=256, seed=0):
+    """
+    This function orders the nodes by the optimal leaf ordering of an average-linkage hierarchical clustering of their
+    spectral embedding. Components with more than max_leaves nodes are first grouped into max_leaves clusters with
+    k-means; the clusters are ordered optimally and the nodes within a cluster by their Fiedler value. This keeps the
+    quadratic clustering step small for large graphs.
+    :param g: array-backed graph
+    :param dimensions: number of dimensions of the spectral embedding
+    :param max_leaves: maximum number of leaves of the clustering
+    :param seed: seed of the random generators
+    :return: array of node positions in order
+    """
+    rng = np.random.default_rng(seed)
+    a = adjacency(g)
+    order = []
+    for part in components(a):
+        if len(part) <= 2:
+            order.append(part)
+            continue
+        embedding = spectral_embedding(a[part][:, part], dimensions, rng)
+        fiedler = _oriented(embedding[:, 0], part)
+
+        if len(part) <= max_leaves:
+            order.append(part[leaves_list(optimal_leaf_ordering(linkage(embedding, 'average'), embedding))])
+            continue
+
+        centroids, labels = kmeans2(embedding, max_leaves, minit='points', seed=seed)
+        used = np.unique(labels)
+        centroids = centroids[used]
+        cluster_rank = np.empty(max_leaves, dtype=np.int64)
+        cluster_rank[used] = ranks(leaves_list(optimal_leaf_ordering(linkage(centroids, 'average'), centroids)))
+        order.append(part[np.lexsort((fiedler, cluster_rank[labels]))])
+
+    return np.concatenate(order) if order else np.empty(0, dtype=np.int64)
+
+
+def add_orderings(name):
+    """
+    This function computes the spectral, barycenter and leaf order orderings of a dataset and writes the rank of each
+    node to the keys 'spectral', 'barycenter' and 'leaf_order'.
+    :param name: dataset name
+    :return: dataset name or None if it was skipped
+    """
+    def update(g):
+        spectral = spectral_ordering(g)
+        orderings = {'spectral': ranks(spectral), 'barycenter': ranks(barycenter_ordering(g, spectral)),
+                     'leaf_order': ranks(leaf_order_ordering(g))}
+        return {key: rank.tolist() for key, rank in orderings.items()}, name
+
+    return update_nodes(name, update)
+
+
+if __name__ == '__main__':
+    if len(sys.argv) < 2:
+        sys.exit('usage: python ordering.py <dataset or directory> [...]')
+    with ProcessPoolExecutor() as executor:
+        for dataset in executor.map(add_orderings, datasets(*sys.argv[1:])):
+            if dataset is not None:
+                print('{}: orderings written'.format(dataset))
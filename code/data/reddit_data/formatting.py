@@ -1,14 +1,18 @@
 import json
 import os
+import sys
 
-root = os.path.dirname(__file__)
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from loader import load
+
+root = os.path.dirname(os.path.abspath(__file__))
 path = os.path.join(root, '')
 
 i = 0
 for file in os.listdir(os.fsencode(path)):
     filename = os.fsdecode(file)
     if filename.endswith('.json'):
-        data = json.load(open(os.path.join(path, filename)))
+        data = load(os.path.join(path, filename))
         formatted = {'nodes': [], 'links': []}
         for n in data['nodes']:
             node = {'id': n['id'], 'name': n['name'],
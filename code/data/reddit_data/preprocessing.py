@@ -1,32 +1,39 @@
 import json
 import os
+import sys
 import networkx as nx
+import numpy as np
 
-root = os.path.dirname(__file__)
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from graph import Column, Graph
+from loader import load_graph
+
+root = os.path.dirname(os.path.abspath(__file__))
 path = os.path.join(root, '')
 
 for file in os.listdir(os.fsencode(path)):
     filename = os.fsdecode(file)
     if filename.endswith('.json'):
         print(filename)
-        data = json.load(open(os.path.join(path, filename)))
+        g = load_graph(os.path.join(path, filename))
 
-        g = nx.node_link_graph(data, directed=False, multigraph=False)
-        closeness = nx.closeness_centrality(g)
-        betweenness = nx.betweenness_centrality(g)
-        centrality = nx.eigenvector_centrality(g, max_iter=200)
+        # the centralities come from networkx, which only gets the edges of the graph
+        simple = nx.Graph()
+        simple.add_nodes_from(range(g.num_nodes))
+        simple.add_edges_from(zip(g.source.tolist(), g.target.tolist()))
+        closeness = nx.closeness_centrality(simple)
+        betweenness = nx.betweenness_centrality(simple)
+        centrality = nx.eigenvector_centrality(simple, max_iter=200)
 
-        for n in g.nodes():
-            # delete all node attributes except 'degree'
-            tmp = g.nodes[n]['attributes']['degree']
-            g.nodes[n]['attributes'].clear()
-            g.nodes[n]['attributes']['degree'] = tmp
+        # keep 'degree' of the node attributes and add 'closeness', 'betweenness' and 'eigenvector' centrality
+        present = np.ones(g.num_nodes, dtype=bool)
+        attributes = {'degree': g.node_attributes['degree']}
+        for key, values in [('closeness', closeness), ('betweenness', betweenness), ('eigenvector', centrality)]:
+            attributes[key] = Column('float', np.array([values[i] for i in range(g.num_nodes)]), present)
 
-            # add 'closeness', 'betweenness' and 'eigenvector' centrality
-            g.nodes[n]['attributes']['closeness'] = closeness[n]
-            g.nodes[n]['attributes']['betweenness'] = betweenness[n]
-            g.nodes[n]['attributes']['eigenvector'] = centrality[n]
+        # the loaded graph is shared, so the result is a new graph on the same arrays
+        result = Graph(g.ids, g.name_labels, g.name_codes, g.source, g.target, attributes, g.edge_attributes,
+                       g.node_fields, g.edge_fields, g.meta)
 
         # write json formatted data
-        json.dump(nx.json_graph.node_link_data(g), open(os.path.join(path, 'preprocessed/' + filename), 'w'), indent=4)
-
+        json.dump(result.to_node_link(), open(os.path.join(path, 'preprocessed/' + filename), 'w'), indent=4)
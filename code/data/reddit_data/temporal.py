@@ -0,0 +1,263 @@
+# This file stores the reddit day series as checkpoints plus per-day deltas and reconstructs any day or range of days.
+# usage: python temporal.py          (writes temporal/ next to the day files)
+#        python temporal.py check    (reconstructs every day from deltas only and compares it with the day files)
+
+import copy
+import json
+import os
+import re
+import sys
+import tempfile
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from loader import load
+
+root = os.path.dirname(os.path.abspath(__file__))
+
+
+def node_key(node):
+    return node['id']
+
+
+def edge_key(edge):
+    return edge['source'], edge['target']
+
+
+def index(items, key):
+    """
+    This function indexes the given nodes or edges by their key.
+    :param items: nodes or edges
+    :param key: function returning the key of an item
+    :return: dict of items
+    """
+    indexed = {}
+    for item in items:
+        k = key(item)
+        if k in indexed:
+            raise ValueError('duplicate key {}'.format(k))
+        indexed[k] = item
+    return indexed
+
+
+def diff_items(old, new, key):
+    """
+    This function computes the delta between two indexed sets of nodes or edges. Items which are only in new are
+    stored completely, items in both only with the attributes and fields that were set or removed. The order of the
+    keys of new is stored as well if patching would not restore it.
+    :param old: dict of items
+    :param new: dict of items
+    :param key: function returning the key of an item
+    :return: delta
+    """
+    removed = [list(k) if isinstance(k, tuple) else k for k in old if k not in new]
+    added = [item for k, item in new.items() if k not in old]
+    changed = []
+    for k, item in new.items():
+        if k not in old or old[k] == item:
+            continue
+        before = old[k]
+        change = {'key': list(k) if isinstance(k, tuple) else k}
+        old_attr = before.get('attributes', {})
+        new_attr = item.get('attributes', {})
+        change['attributes'] = {a: v for a, v in new_attr.items() if a not in old_attr or old_attr[a] != v}
+        change['removed_attributes'] = [a for a in old_attr if a not in new_attr]
+        change['fields'] = {f: v for f, v in item.items() if f != 'attributes' and (f not in before or before[f] != v)}
+        change['removed_fields'] = [f for f in before if f not in item]
+        changed.append(change)
+
+    delta = {'removed': removed, 'added': added, 'changed': changed}
+    # patching keeps the remaining items in place and appends the added ones, store the order if it differs
+    patched = [k for k in old if k in new] + [k for k in new if k not in old]
+    if patched != list(new):
+        delta['order'] = [list(k) if isinstance(k, tuple) else k for k in new]
+    return delta
+
+
+def patch_items(items, delta, key):
+    """
+    This function applies a delta to an indexed set of nodes or edges in place, in the order of the new items.
+    :param items: dict of items
+    :param delta: delta created by diff_items
+    :param key: function returning the key of an item
+    """
+    for k in delta['removed']:
+        del items[tuple(k) if isinstance(k, list) else k]
+    for change in delta['changed']:
+        k = tuple(change['key']) if isinstance(change['key'], list) else change['key']
+        item = dict(items[k])
+        attributes = dict(item.get('attributes', {}))
+        attributes.update(change['attributes'])
+        for a in change['removed_attributes']:
+            del attributes[a]
+        item.update(change['fields'])
+        for f in change['removed_fields']:
+            del item[f]
+        if 'attributes' in item or attributes:
+            item['attributes'] = attributes
+        items[k] = item
+    for item in delta['added']:
+        items[key(item)] = item
+    if 'order' in delta:
+        ordered = {k: items[k] for k in (tuple(k) if isinstance(k, list) else k for k in delta['order'])}
+        items.clear()
+        items.update(ordered)
+
+
+def diff(old, new):
+    """
+    This function computes the delta between two node-link snapshots.
+    :param old: node-link data
+    :param new: node-link data
+    :return: delta
+    """
+    return {'nodes': diff_items(index(old['nodes'], node_key), index(new['nodes'], node_key), node_key),
+            'links': diff_items(index(old['links'], edge_key), index(new['links'], edge_key), edge_key)}
+
+
+class Snapshot:
+    """
+    This class holds the reconstructed state of one day as indexed nodes and edges, so that deltas can be applied
+    without rebuilding the lists.
+    """
+    __slots__ = ('nodes', 'links')
+
+    def __init__(self, data):
+        self.nodes = index(data['nodes'], node_key)
+        self.links = index(data['links'], edge_key)
+
+    def apply(self, delta):
+        patch_items(self.nodes, delta['nodes'], node_key)
+        patch_items(self.links, delta['links'], edge_key)
+
+    def data(self):
+        # items which do not change are shared between days, so every day gets its own copy
+        return copy.deepcopy({'nodes': list(self.nodes.values()), 'links': list(self.links.values())})
+
+
+def build_store(store, files, checkpoint_every=7, compact=True):
+    """
+    This function writes the given day files as a temporal store: the first day and every checkpoint_every-th day are
+    stored as checkpoints, all other days as the delta to the previous day. A checkpoint is also written if the delta
+    would be larger than the snapshot itself, so days which share little with the day before cost no more than before.
+    The reddit days share so little that all of them become checkpoints; compact=False writes the deltas anyway, which
+    check_store uses to test the delta path on the real data.
+    :param store: directory of the store
+    :param files: dict of day -> node-link file
+    :param checkpoint_every: maximum number of days between two checkpoints
+    :param compact: write a checkpoint instead of a delta which is larger than the snapshot
+    :return: index of the store
+    """
+    os.makedirs(store, exist_ok=True)
+    days = sorted(files)
+    checkpoints = []
+    previous = None
+    for day in days:
+        data = load(files[day])
+        snapshot = json.dumps(data)
+
+        entry = None
+        if previous is not None and (day - checkpoints[-1]) < checkpoint_every:
+            delta = json.dumps(diff(previous, data))
+            if len(delta) < len(snapshot) or not compact:
+                entry = '{"delta": ' + delta + '}'
+        if entry is None:
+            entry = '{"checkpoint": ' + snapshot + '}'
+            checkpoints.append(day)
+
+        with open(os.path.join(store, 'day_{}.json'.format(day)), 'w') as outfile:
+            outfile.write(entry)
+        previous = data
+
+    info = {'days': days, 'checkpoints': checkpoints}
+    with open(os.path.join(store, 'index.json'), 'w') as outfile:
+        json.dump(info, outfile, indent=4)
+
+    return info
+
+
+def load_index(store):
+    return json.load(open(os.path.join(store, 'index.json')))
+
+
+def load_range(store, first, last, info=None):
+    """
+    This function reconstructs all days between first and last (inclusive). Only the last checkpoint before first and
+    the deltas up to last are read.
+    :param store: directory of the store
+    :param first: first day
+    :param last: last day
+    :param info: index of the store (read if not given)
+    :return: dict of day -> node-link data
+    """
+    info = info if info is not None else load_index(store)
+    start = max([c for c in info['checkpoints'] if c <= first], default=info['checkpoints'][0])
+
+    snapshot = None
+    result = {}
+    for day in info['days']:
+        if day < start:
+            continue
+        if day > last:
+            break
+        entry = json.load(open(os.path.join(store, 'day_{}.json'.format(day))))
+        if 'checkpoint' in entry:
+            snapshot = Snapshot(entry['checkpoint'])
+        else:
+            snapshot.apply(entry['delta'])
+        if day >= first:
+            result[day] = snapshot.data()
+
+    return result
+
+
+def load_day(store, day, info=None):
+    """
+    This function reconstructs a single day.
+    :param store: directory of the store
+    :param day: day
+    :param info: index of the store (read if not given)
+    :return: node-link data
+    """
+    days = load_range(store, day, day, info)
+    if day not in days:
+        raise KeyError('day {} is not in the store'.format(day))
+    return days[day]
+
+
+def day_files(path):
+    """
+    This function lists the reddit_day_N.json files in the given directory.
+    :param path: directory
+    :return: dict of day -> file
+    """
+    files = {}
+    for filename in os.listdir(path):
+        match = re.fullmatch(r'reddit_day_(\d+)\.json', filename)
+        if match:
+            files[int(match.group(1))] = os.path.join(os.path.abspath(path), filename)
+    return files
+
+
+def check_store(store, files):
+    """
+    This function reconstructs all days of a store and compares them with the day files.
+    :param store: directory of the store
+    :param files: dict of day -> node-link file
+    :return: list of days which differ
+    """
+    info = load_index(store)
+    days = load_range(store, info['days'][0], info['days'][-1], info)
+    return [day for day in info['days'] if days[day] != load(files[day])]
+
+
+if __name__ == '__main__':
+    for directory in [root, os.path.join(root, 'preprocessed')]:
+        files = day_files(directory)
+        if sys.argv[1:2] == ['check']:
+            # write a delta for every day but the first, so that the reconstruction from deltas is tested
+            with tempfile.TemporaryDirectory() as store:
+                build_store(store, files, checkpoint_every=len(files) + 1, compact=False)
+                print(directory, 'days which differ:', check_store(store, files))
+        else:
+            info = build_store(os.path.join(directory, 'temporal'), files)
+            print(directory, 'checkpoints:', info['checkpoints'])
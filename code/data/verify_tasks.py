@@ -0,0 +1,148 @@
+# This file recomputes the solutions of the tasks in tasks/*.json from their descriptions and reports mismatches.
+# usage: python verify_tasks.py [--bundle] [<task file> ...]
+#        --bundle also reports datasets which differ from the copy in the dataset bundle (see bundle.py check)
+
+import glob
+import os
+import re
+import sys
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from bundle import stale_datasets
+from loader import load, load_all, root
+
+patterns = {
+    'plain': re.compile(r'Find all friends of (?P<node>.+)\.$'),
+    'one': re.compile(r'Find a friend of (?P<node>.+) whose friendship has the second highest value in '
+                      r'(?P<attribute>.+)\.$'),
+    'two': re.compile(r'Find all friends of (?P<node>.+) whose friendship has more (?P<first>.+) than '
+                      r'(?P<second>.+)\.$'),
+}
+
+
+def textual_solution(names, conj):
+    """
+    This function joins the names of a solution like generate_tasks.generate_textual_solution.
+    :param names: node names
+    :param conj: 'and' or 'or'
+    :return: text
+    """
+    if len(names) == 1:
+        return names[0]
+    return ", ".join(names[:-1]) + ' ' + conj + ' ' + names[-1]
+
+
+def find_node(g, name):
+    """
+    This function finds the position of the node with the given name.
+    :param g: array-backed graph
+    :param name: node name
+    :return: position
+    """
+    matches = [i for i, label in enumerate(g.name_labels) if str(label) == name]
+    positions = np.flatnonzero(np.isin(g.name_codes, matches))
+    if len(positions) != 1:
+        raise ValueError('{} nodes are named {}'.format(len(positions), name))
+    return int(positions[0])
+
+
+def find_attribute(g, name):
+    """
+    This function finds the edge attribute whose lower case name is used in a description.
+    :param g: array-backed graph
+    :param name: lower case attribute name
+    :return: edge attribute column
+    """
+    for attribute, column in g.edge_attributes.items():
+        if attribute.lower() == name:
+            return column
+    raise ValueError('no edge attribute {}'.format(name))
+
+
+def solve(g, task):
+    """
+    This function recomputes the solution of a task from its description.
+    :param g: array-backed graph of the dataset of the task
+    :param task: task
+    :return: list of solution node ids, textual solution
+    """
+    match = patterns[task['type']].match(task['task'])
+    if match is None:
+        raise ValueError('description does not match a {} task'.format(task['type']))
+
+    node = find_node(g, match.group('node'))
+    neighbors = g.neighbors(node)
+    edges = g.incident_edges(node)
+
+    if task['type'] == 'plain':
+        selected = neighbors
+        conj = 'and'
+    elif task['type'] == 'one':
+        column = find_attribute(g, match.group('attribute'))
+        present = column.present[edges]
+        values = column.values[edges]
+        distinct = np.unique(values[present])
+        if len(distinct) < 2:
+            raise ValueError('fewer than two different values')
+        selected = neighbors[present & (values == distinct[-2])]
+        conj = 'or'
+    else:
+        first = find_attribute(g, match.group('first'))
+        second = find_attribute(g, match.group('second'))
+        present = first.present[edges] & second.present[edges]
+        selected = neighbors[present & (first.values[edges] > second.values[edges])]
+        conj = 'and'
+
+    # the generator lists the solution in the order of the nodes in the dataset
+    selected = np.unique(selected[selected != node])
+    if len(selected) == 0:
+        raise ValueError('empty solution')
+    names = [str(g.name(i)) for i in selected]
+    return g.ids[selected].tolist(), textual_solution(names, conj)
+
+
+def verify_file(filename):
+    """
+    This function verifies all tasks of a task file. Every referenced dataset is loaded once.
+    :param filename: task file
+    :return: list of mismatches
+    """
+    tasks = load(filename)
+    trials = [(task_type, phase, i, task) for task_type, phases in tasks.items()
+              for phase, trial_list in phases.items() for i, task in enumerate(trial_list)]
+    graphs = load_all([task['data'] for _, _, _, task in trials], graph=True)
+
+    mismatches = []
+    for task_type, phase, i, task in trials:
+        where = '{}: {}/{}/{}'.format(os.path.relpath(filename, root), task_type, phase, i)
+        try:
+            ids, text = solve(graphs[task['data']], task)
+        except ValueError as error:
+            mismatches.append('{}: {} ({})'.format(where, error, task['task']))
+            continue
+        stored = [n['id'] for n in task['solution']]
+        if stored != ids:
+            mismatches.append('{}: solution {} instead of {}'.format(where, stored, ids))
+        if task['text_solution'] != text:
+            mismatches.append('{}: text solution "{}" instead of "{}"'.format(where, task['text_solution'], text))
+    return mismatches
+
+
+if __name__ == '__main__':
+    arguments = [argument for argument in sys.argv[1:] if argument != '--bundle']
+    files = arguments or sorted(glob.glob(os.path.join(root, 'tasks', '*.json')))
+    with ProcessPoolExecutor() as executor:
+        results = list(executor.map(verify_file, files))
+
+    for filename, mismatches in zip(files, results):
+        print('{}: {} mismatches'.format(filename, len(mismatches)))
+        for mismatch in mismatches:
+            print('  ' + mismatch)
+
+    # the study page loads the datasets from the bundle, so on request it is checked as well
+    stale = stale_datasets(files) if '--bundle' in sys.argv[1:] else []
+    for dataset in stale:
+        print('{}: changed since the bundle was written, run python bundle.py'.format(dataset))
+    sys.exit(1 if any(results) or stale else 0)
@@ -1,4 +1,14 @@
 function forcedirected(view, nodes, attributes, edges) {
+    // start from the positions precomputed by data/layout.py if available, the simulation then only separates
+    // overlapping nodes and keeps them inside the view, as the precomputed layout does not know the node sizes
+    const precomputed = nodes.length > 0 && nodes.every(d => d.force);
+    if (precomputed) {
+        nodes.forEach(function (d) {
+            d.x = max_radius + (view.width - 2 * max_radius) * d.force[0];
+            d.y = max_radius + (view.height - 2 * max_radius) * d.force[1];
+        })
+    }
+
     const simulation = d3.forceSimulation(nodes)
         .force("link", d3.forceLink().id(function (d) {
             return d.id;
@@ -18,5 +28,9 @@ function forcedirected(view, nodes, attributes, edges) {
         .links(edges)
         .distance(Math.min(view.width, view.height) / Math.sqrt(nodes.length));
 
-    simulation.tick(400);
+    if (precomputed) {
+        simulation.force("link", null).force("charge", null).force("center", null).tick(50);
+    } else {
+        simulation.tick(400);
+    }
 }
\ No newline at end of file
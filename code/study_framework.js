@@ -14,6 +14,9 @@ const width = parseInt(d3.select("#vis").style("width"), 10) - 2 * margin;
 const height = parseInt(d3.select("#vis").style("height"), 10) - 2 * margin;
 const g = d3.select("#g").attr("transform", "translate(" + margin + ", " + margin + ")");
 
+// index of the dataset bundle written by data/bundle.py (null if there is none)
+let bundleIndex = null;
+
 let selectedNode = null;
 let selectedEdge = null;
 let selectedNodeSide = "top";
@@ -25,11 +28,34 @@ let BFNodeHighlighting = "line";
  * @param taskFile
  */
 function start(taskFile) {
-    d3.json("data/tasks/" + taskFile).then(function (tasks) {
+    const index = d3.json("data/bundle/index.json").catch(() => null);
+    Promise.all([d3.json("data/tasks/" + taskFile), index]).then(function ([tasks, index]) {
+        bundleIndex = index;
         process(tasks);
     });
 }
 
+/**
+ * This function loads the data of a task. Datasets in the bundle are fetched with a range request and decompressed,
+ * all others are loaded from their own file.
+ * @param path
+ * @returns {Promise<*>}
+ */
+function loadDataset(path) {
+    const entry = bundleIndex === null ? undefined : bundleIndex.datasets[path];
+    if (entry === undefined) {
+        return d3.json("data/" + path);
+    }
+
+    const end = entry.offset + entry.length - 1;
+    return fetch("data/bundle/" + bundleIndex.file, {headers: {"Range": "bytes=" + entry.offset + "-" + end}})
+        .then(function (response) {
+            // servers without range support answer with the whole bundle
+            return response.status === 206 ? response.blob() : response.blob().then(b => b.slice(entry.offset, end + 1));
+        })
+        .then(blob => new Response(blob.stream().pipeThrough(new DecompressionStream(bundleIndex.compression))).json());
+}
+
 /**
  * This function presents the tasks in the given order. This includes loading the task, updating the progress bar and logging the answers.
  * @param tasks
@@ -149,7 +175,7 @@ function loadTask(task) {
     g.selectAll("*").remove();
     clearAnswers();
 
-    d3.json("data/" + task.data).then(function (data) {
+    loadDataset(task.data).then(function (data) {
             const network = createNetworkData(data);
             const parameters = task.parameters;
 
@@ -365,6 +365,12 @@ function sortByNeighborhood(nodes, edges, selected) {
     nodes.unshift(selectedNode);
 }
 
+function sortByCluster(nodes) {
+    nodes.sort(function (a, b) {
+        return (a.cluster > b.cluster) ? 1 : ((b.cluster > a.cluster) ? -1 : 0);
+    });
+}
+
 function sortByGansner(nodes) {
     nodes.sort(function (a, b) {
         return (a.gansner > b.gansner) ? 1 : ((b.gansner > a.gansner) ? -1 : 0);